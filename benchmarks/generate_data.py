@@ -0,0 +1,128 @@
+import os
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+
+# Allow `python benchmarks/generate_data.py` from the project root
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from functions.get_category import RULES
+
+# Each account folder gets one of these layouts, in turn
+BANK_STYLES = ['chase', 'costco', 'amazon']
+
+# Over-long lines per file, the kind read_csv(on_bad_lines='skip') drops
+BAD_ROWS_PER_FILE = 3
+
+# Merchants no rule matches, so the Uncategorized path is exercised too
+UNMATCHED_MERCHANTS = [
+    'SQ *LOCAL SHOP', 'TST* NEIGHBORHOOD SPOT', 'PAYMENT THANK YOU', 'INTEREST CHARGED',
+    'LATE FEE', 'MISC MERCHANT', 'CITY OF SAN DIEGO', 'SP * ONLINE STORE',
+]
+
+def merchant_pool(rng, size=5000):
+    """
+    Realistic-looking merchant strings built from the real rule keywords, with
+    store numbers and locations like the banks add. A fixed pool keeps the
+    distinct-description count realistic (exports repeat merchants a lot).
+    """
+    keywords = [keyword for _, keywords in RULES for keyword in keywords] + UNMATCHED_MERCHANTS
+    picks = rng.choice(keywords, size=size)
+    store_numbers = rng.integers(1, 9999, size=size)
+    cities = rng.choice(['SAN DIEGO CA', 'IRVINE CA', 'AUSTIN TX', 'SEATTLE WA', ''], size=size)
+    return np.array([f"{kw} #{num} {city}".strip() for kw, num, city in zip(picks, store_numbers, cities)], dtype=object)
+
+def random_transactions(rng, rows, pool):
+    """
+    Dates over ten years, mostly small purchases and a few large deposits.
+    Spending is negative, income positive (Chase sign convention).
+    """
+    dates = pd.Timestamp('2015-01-01') + pd.to_timedelta(rng.integers(0, 3650, size=rows), unit='D')
+    descriptions = pool[rng.zipf(1.3, size=rows) % len(pool)]
+    amounts = -np.round(rng.lognormal(3, 1, size=rows), 2)
+    deposits = rng.random(rows) < 0.05
+    amounts[deposits] = np.round(rng.uniform(500, 5000, size=deposits.sum()), 2)
+    return pd.DataFrame({'date': dates, 'description': descriptions, 'amount': amounts}).sort_values('date')
+
+def to_bank_style(tx, style):
+    """
+    Lays the transactions out the way each bank exports them.
+    """
+    if style == 'chase':
+        return pd.DataFrame({
+            'Details': np.where(tx['amount'] < 0, 'DEBIT', 'CREDIT'),
+            'Posting Date': tx['date'].dt.strftime('%m/%d/%Y'),
+            'Description': tx['description'],
+            'Amount': tx['amount'],
+            'Type': np.where(tx['amount'] < 0, 'DEBIT_CARD', 'ACH_CREDIT'),
+            'Balance': np.round(tx['amount'].cumsum() + 10000, 2),
+            'Check or Slip #': '',
+        })
+    if style == 'costco':
+        # Debit/Credit split with $ and thousands separators, spending as positive debits
+        debit = (-tx['amount']).where(tx['amount'] < 0)
+        credit = tx['amount'].where(tx['amount'] > 0) * -1
+        money = lambda col: col.map(lambda v: '' if pd.isna(v) else f"${v:,.2f}")
+        return pd.DataFrame({
+            'Status': 'Cleared',
+            'Date': tx['date'].dt.strftime('%m/%d/%Y'),
+            'Description': tx['description'],
+            'Debit': money(debit),
+            'Credit': money(credit),
+            'Member Name': 'CARDHOLDER',
+        })
+    return pd.DataFrame({
+        'Transaction Date': tx['date'].dt.strftime('%m/%d/%Y'),
+        'Merchant': tx['description'],
+        'Amount': tx['amount'],
+        'Category': 'Shopping',
+    })
+
+def write_with_bad_rows(frame, path, rng, bad_rows):
+    """
+    Writes frame as CSV with bad_rows copies of random data lines that carry
+    one field too many. Both readers have to skip those (see run_benchmarks).
+    """
+    lines = frame.to_csv(index=False).splitlines(keepends=True)
+    for position in sorted(rng.integers(1, len(lines) + 1, size=bad_rows), reverse=True):
+        source = lines[min(position, len(lines) - 1)]
+        lines.insert(position, source.rstrip('\r\n') + ',EXTRA FIELD\n')
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.writelines(lines)
+
+def generate_dataset(out_dir, rows, accounts=6, seed=0, bad_rows=BAD_ROWS_PER_FILE):
+    """
+    Writes `rows` transactions spread over `accounts` account folders (one CSV
+    each, rotating through BANK_STYLES), plus bad_rows malformed lines per
+    file. Returns the data directory.
+    """
+    rng = np.random.default_rng(seed)
+    pool = merchant_pool(rng)
+    os.makedirs(out_dir, exist_ok=True)
+
+    per_account = np.full(accounts, rows // accounts)
+    per_account[: rows % accounts] += 1
+
+    for i, account_rows in enumerate(per_account):
+        style = BANK_STYLES[i % len(BANK_STYLES)]
+        folder = os.path.join(out_dir, f"{style}_{i + 1}")
+        os.makedirs(folder, exist_ok=True)
+        tx = random_transactions(rng, int(account_rows), pool)
+        write_with_bad_rows(to_bank_style(tx, style), os.path.join(folder, f"{style}_export.csv"), rng, bad_rows)
+
+    return out_dir
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic bank exports for benchmarking.")
+    parser.add_argument('out_dir')
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--accounts', type=int, default=6)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--bad-rows', type=int, default=BAD_ROWS_PER_FILE, help="Malformed lines per file.")
+    args = parser.parse_args()
+
+    generate_dataset(args.out_dir, args.rows, args.accounts, args.seed, args.bad_rows)
+    print(f"Wrote {args.rows:,} rows across {args.accounts} accounts to {args.out_dir}")
@@ -0,0 +1,174 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import datetime
+import pandas as pd
+
+# Allow `python benchmarks/run_benchmarks.py` from the project root
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from benchmarks.generate_data import generate_dataset
+from functions.build_df import find_account_files
+from functions.standardize_columns import standardize_columns
+from functions.schema_registry import read_typed_csv
+from functions.apply_categories import categorize_rows, flag_recurring_rows
+from functions.compact_dtypes import compact_dtypes
+from functions.spending_cube import build_spending_cube, slice_cube, sum_by
+from functions.date_index import sort_by_date, date_slice, category_mask
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BENCH_DIR, '.data')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+# A stage counts as a regression when it is this much slower than the baseline
+# (and by more than a few ms, so timer noise on tiny stages doesn't count)
+REGRESSION_THRESHOLD = 1.10
+REGRESSION_MIN_SECONDS = 0.005
+
+def timed(stages, name, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    stages[name] = time.perf_counter() - start
+    return result
+
+def check_same_rows(account_files, frames, typed):
+    """
+    The typed read has to keep exactly the rows the plain read does; the
+    generated files carry malformed lines both must skip.
+    """
+    for (name, path), plain, fast in zip(account_files, frames, typed):
+        if fast is not None and len(fast) != len(plain):
+            raise AssertionError(f"{os.path.basename(path)} ({name}): typed read kept {len(fast)} rows, plain read {len(plain)}")
+
+def run_once(data_dir):
+    """
+    Runs the pipeline stage by stage on data_dir and returns {stage: seconds}.
+    Mirrors build_current_budget_df (without the file cache) plus the
+    dashboard's per-rerun aggregation.
+    """
+    stages = {}
+    account_files = timed(stages, 'scan', find_account_files, data_dir)
+
+    def read_all():
+        return [(name, pd.read_csv(path, on_bad_lines='skip', index_col=False)) for name, path in account_files]
+    raw = timed(stages, 'ingest', read_all)
+
+    def standardize_all():
+        frames = []
+        for name, df in raw:
+            df['Account'] = name
+            frames.append(standardize_columns(df))
+        return frames
+    frames = timed(stages, 'standardize', standardize_all)
+
+    # What load_account_csv actually does for known layouts: ingest + standardize in one typed read
+    typed = timed(stages, 'typed_ingest', lambda: [read_typed_csv(path, name) for name, path in account_files])
+    check_same_rows(account_files, frames, typed)
+
+    master_df = timed(stages, 'concat', lambda: pd.concat(frames, ignore_index=True))
+
+    # The two halves apply_categories runs, timed apart so the stages add up to the
+    # total (read from profile_stage instead, they would include tracemalloc's overhead)
+    categorized = timed(stages, 'categorize', categorize_rows, master_df)
+    timed(stages, 'recurring', flag_recurring_rows, master_df, categorized)
+    master_df = timed(stages, 'compact_dtypes', lambda: sort_by_date(compact_dtypes(master_df)))
+
+    cube = timed(stages, 'build_cube', build_spending_cube, master_df)
+
+    # One dashboard rerun: last year's data minus the default exclusions
+    end = master_df['date'].max()
+    start = end - pd.DateOffset(years=1)
+    exclude = ['Income/Payroll', 'Transfer to Savings', 'Loan/Credit Card Payment', 'Transfers/P2P']
+
+    def dashboard_rerun():
+        view = slice_cube(cube, start, end, exclude)
+        spend = view[view['sign'] < 0]
+        sum_by(spend, 'category')
+        spend.groupby('Is_Recurring')['amount'].sum()
+        rows = date_slice(master_df, start, end)
+        rows[category_mask(rows['category'], exclude)]
+    timed(stages, 'dashboard_aggregation', dashboard_rerun)
+
+    # typed_ingest redoes ingest + standardize, so it is left out of the total
+    stages['total'] = sum(seconds for name, seconds in stages.items() if name != 'typed_ingest')
+    return stages, len(master_df)
+
+def compare(run, baseline):
+    """
+    Prints each stage of a run against the same-size run of a previous results
+    file and returns the stages that got slower than REGRESSION_THRESHOLD.
+    """
+    regressions = []
+    print(f"\nCompared to baseline ({baseline['rows']:,} rows):")
+    for stage, seconds in run['stages'].items():
+        before = baseline['stages'].get(stage)
+        if not before:
+            continue
+        ratio = seconds / before
+        slower = ratio > REGRESSION_THRESHOLD and seconds - before > REGRESSION_MIN_SECONDS
+        flag = '  <-- slower' if slower else ''
+        print(f"  {stage:<22} {before:9.4f}s -> {seconds:9.4f}s  x{ratio:5.2f}{flag}")
+        if flag:
+            regressions.append(stage)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Time each stage of the budget pipeline on synthetic data.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 100_000],
+                        help="Dataset sizes to run (1k up to 10M).")
+    parser.add_argument('--accounts', type=int, default=6)
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per size; the fastest run is kept.")
+    parser.add_argument('--compare', help="Previous results JSON to compare against.")
+    parser.add_argument('--output', help="Where to write the results JSON (default: benchmarks/results/).")
+    args = parser.parse_args()
+
+    runs = []
+    for rows in args.rows:
+        data_dir = os.path.join(DATA_DIR, f"{rows}_{args.accounts}")
+        if not os.path.exists(data_dir):
+            print(f"Generating {rows:,} rows...")
+            generate_dataset(data_dir, rows, args.accounts)
+
+        best = None
+        for _ in range(args.repeat):
+            stages, row_count = run_once(data_dir)
+            if best is None or stages['total'] < best['total']:
+                best = stages
+
+        print(f"\n{row_count:,} rows ({args.accounts} accounts), best of {args.repeat}:")
+        for stage, seconds in best.items():
+            print(f"  {stage:<22} {seconds:9.4f}s")
+        runs.append({'rows': row_count, 'stages': best})
+
+    results = {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'accounts': args.accounts,
+        'runs': runs,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"bench_{datetime.datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.compare:
+        regressions = []
+        with open(args.compare, encoding='utf-8') as f:
+            baseline_runs = {run['rows']: run for run in json.load(f)['runs']}
+        for run in runs:
+            if run['rows'] in baseline_runs:
+                regressions += compare(run, baseline_runs[run['rows']])
+        if regressions:
+            print(f"\nRegressions: {', '.join(sorted(set(regressions)))}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
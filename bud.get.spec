@@ -1,9 +1,10 @@
 # -*- mode: python ; coding: utf-8 -*-
 from PyInstaller.utils.hooks import collect_all
 
-datas = [('dashboard/dashboard.py', 'dashboard')]
+datas = [('dashboard/dashboard.py', 'dashboard'), ('functions/rules.json', 'functions')]
 binaries = []
-hiddenimports = ['pandas', 'plotly']
+# dashboard.py is bundled as data, so the project modules only it imports have to be listed
+hiddenimports = ['pandas', 'plotly', 'functions.master_store', 'functions.spending_cube', 'functions.date_index', 'functions.detect_recurring', 'functions.sqlite_store', 'functions.export_budget', 'functions.dashboard_views']
 tmp_ret = collect_all('streamlit')
 datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
 
@@ -1,9 +1,24 @@
+import os
+import sys
+import inspect
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import datetime
-import io
-import zipfile
+
+# Make the project root importable when Streamlit runs this file directly
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from functions.master_store import find_master, load_master, sqlite_for_store
+from functions.spending_cube import build_spending_cube, sum_by
+from functions.date_index import sort_by_date
+from functions.detect_recurring import detect_recurring
+from functions.dashboard_views import (
+    spending_view, overview_totals, fixed_vs_variable, account_breakdown,
+    category_spend, subscriptions_in_range, DINING_CATEGORIES
+)
+from functions.sqlite_store import query_transactions, count_transactions, query_frame, count_frame
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(
@@ -13,34 +28,146 @@ st.set_page_config(
 )
 
 # --- 1. Load Data ---
-@st.cache_data
-def load_data():
-    try:
-        df = pd.read_csv('../master_budget.csv')
-    except FileNotFoundError:
-        try:
-            df = pd.read_csv('master_budget.csv')
-        except FileNotFoundError:
-            return pd.DataFrame()
-    
-    if not df.empty:
-        df['date'] = pd.to_datetime(df['date'])
-    return df
+def store_version():
+    # Typed store (memory-mapped) if present, else the CSV. The store is swapped
+    # in atomically on every rebuild, so (path, mtime) identifies its contents.
+    path = find_master(['..', '.'])
+    if path is None:
+        return None, None
+    return path, os.stat(path).st_mtime_ns
+
+# Each cache below is keyed by the store version: a rebuild (e.g. main.py --watch)
+# misses the cache once, old versions age out
+@st.cache_data(max_entries=2)
+def load_data(path, version):
+    if path is None:
+        return pd.DataFrame()
+    # Kept sorted by date so every filter below is a binary search
+    return sort_by_date(load_master(path))
+
+@st.cache_data(max_entries=2)
+def load_cube(path, version):
+    # Pre-aggregated totals so filters don't rescan the raw rows
+    data = load_data(path, version)
+    return build_spending_cube(data) if not data.empty else pd.DataFrame()
+
+@st.cache_data(max_entries=2)
+def load_recurring(path, version):
+    # Recurring charges found from their timing, over the whole history
+    data = load_data(path, version)
+    return detect_recurring(data) if not data.empty else pd.DataFrame()
+
+@st.cache_data(max_entries=2)
+def load_db(path, version):
+    # Indexed copy of the store for the row-level panels. Only the ETL writes it,
+    # always before the store itself; None if it does not belong to this store
+    return sqlite_for_store(path)
+
+def fetch_rows(path, version, **query):
+    db = load_db(path, version)
+    if db is None:
+        # No matching SQLite copy (e.g. a store from an older version): same query in pandas
+        return query_frame(load_data(path, version), **query)
+    return query_transactions(db, **query)
+
+def count_rows(path, version, **filters):
+    db = load_db(path, version)
+    if db is None:
+        return count_frame(load_data(path, version), **filters)
+    return count_transactions(db, **filters)
+
+@st.cache_data(max_entries=2)
+def load_options(path, version):
+    # Sidebar choices: (first day, last day, categories, accounts), None without data
+    data = load_data(path, version)
+    if data.empty:
+        return None
+    return (
+        data['date'].min().date(), data['date'].max().date(),
+        sorted(data['category'].dropna().unique().tolist()), sorted(data['Account'].dropna().unique().tolist())
+    )
 
-df = load_data()
+# Panel data per filter state. Store version, date range, excluded categories
+# and account are the cache key; the least recently used states are evicted
+VIEW_CACHE_ENTRIES = 32
 
-if df.empty:
-    st.error("⚠️ Data file not found. Please run the app next to your 'master_budget.csv'.")
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES)
+def overview_data(path, version, start_date, end_date, exclude_cats):
+    view, spend = spending_view(load_cube(path, version), start_date, end_date, exclude_cats)
+    return overview_totals(view), sum_by(spend, 'category'), fixed_vs_variable(spend)
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES)
+def account_data(path, version, start_date, end_date, exclude_cats, account):
+    _, spend = spending_view(load_cube(path, version), start_date, end_date, exclude_cats)
+    total, count, per_category = account_breakdown(spend, account)
+    rows = fetch_rows(
+        path, version, start_date=start_date, end_date=end_date, accounts=[account], exclude_categories=exclude_cats,
+        sign=-1, columns=['date', 'description', 'amount', 'category'], order_by='-date'
+    ) if count else None
+    return total, count, per_category, rows
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES)
+def account_checks(path, version, start_date, end_date, account):
+    # Debugger counts, from the indexed store when there is one
+    in_range = dict(start_date=start_date, end_date=end_date, accounts=[account])
+    range_count = count_rows(path, version, **in_range)
+    neg_count = count_rows(path, version, sign=-1, **in_range)
+    sample = fetch_rows(path, version, order_by='date', limit=5, **in_range) if range_count and not neg_count else None
+    return count_rows(path, version, accounts=[account]), range_count, neg_count, sample
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES)
+def savings_data(path, version, start_date, end_date, exclude_cats):
+    _, spend = spending_view(load_cube(path, version), start_date, end_date, exclude_cats)
+    subs, monthly_cost = subscriptions_in_range(load_recurring(path, version), start_date, end_date, exclude_cats)
+    top = fetch_rows(
+        path, version, start_date=start_date, end_date=end_date, exclude_categories=exclude_cats, sign=-1,
+        columns=['date', 'description', 'amount', 'category', 'Account'], order_by='amount', limit=10
+    )
+    top['amount'] = top['amount'].abs()
+    return subs, monthly_cost, category_spend(spend, DINING_CATEGORIES), top
+
+store_path, loaded_version = store_version()
+# Small and cached; the full frame is only pulled into a rerun when an export needs it
+options = load_options(store_path, loaded_version)
+
+# Rerun on our own when the store is rebuilt, so new exports show up without a refresh
+if hasattr(st, 'fragment'):
+    # Check every second while run_app.py is still building, every 5s after that
+    @st.fragment(run_every=1 if os.environ.get('BUDGET_BUILDING') else 5)
+    def watch_store():
+        if store_version() != (store_path, loaded_version):
+            st.rerun()
+    watch_store()
+
+if options is None and os.environ.get('BUDGET_BUILDING'):
+    # run_app.py starts the server while the first build is still running; the
+    # store watcher above reruns the page as soon as it lands
+    st.info("⏳ Building your budget... this page refreshes by itself when the data is ready.")
+    st.stop()
+
+if options is None:
+    st.error("⚠️ Data file not found. Please run the app next to your 'master_budget.feather' (or 'master_budget.csv').")
     st.stop()
 
+# Only needed once there is something to chart
+import plotly.express as px
+
 # --- 2. Sidebar Filters ---
 st.sidebar.header("Filter Your Data")
 
-min_date = df['date'].min().date()
-max_date = df['date'].max().date()
+min_date, max_date, categories, account_list = options
 
+previous_bounds = st.session_state.get('data_bounds')
 if 'date_range' not in st.session_state:
     st.session_state['date_range'] = (min_date, max_date)
+elif previous_bounds and previous_bounds != (min_date, max_date) and len(st.session_state['date_range']) == 2:
+    # The store was rebuilt: keep the selection inside the new data, and if it
+    # ran to the last day, follow the new last day
+    start, end = st.session_state['date_range']
+    end = max_date if end == previous_bounds[1] else min(end, max_date)
+    start = max(start, min_date)
+    st.session_state['date_range'] = (start, end) if start <= end else (min_date, max_date)
+st.session_state['data_bounds'] = (min_date, max_date)
 
 def set_this_month():
     today = pd.Timestamp.now().date()
@@ -57,157 +184,149 @@ start_date, end_date = st.sidebar.date_input(
     key='date_range'
 )
 
-categories = sorted(df['category'].dropna().unique().tolist())
 default_exclude = ['Income/Payroll', 'Transfer to Savings', 'Loan/Credit Card Payment', 'Transfers', 'Transfers/P2P']
 default_exclude = [c for c in default_exclude if c in categories]
 
 exclude_cats = st.sidebar.multiselect("Exclude Categories", options=categories, default=default_exclude)
-
-# Apply Masks
-mask = (
-    (df['date'].dt.date >= start_date) & 
-    (df['date'].dt.date <= end_date) & 
-    (~df['category'].isin(exclude_cats))
-)
-filtered_df = df[mask]
-income_df = filtered_df[filtered_df['amount'] > 0]
-spend_df = filtered_df[filtered_df['amount'] < 0]
+# Part of the cache key below, so the same selection in any order is one entry
+exclude_key = tuple(sorted(exclude_cats))
+filters = (store_path, loaded_version, start_date, end_date, exclude_key)
 
 st.title("💸 bud.get")
 
 # --- TABS ---
-tab1, tab2, tab3, tab4 = st.tabs(["📊 Overview", "📂 Account Deep Dive", "💡 Savings Insights", "📤 Exports"])
+tab_labels = ["📊 Overview", "📂 Account Deep Dive", "💡 Savings Insights", "📤 Exports"]
+if 'on_change' in inspect.signature(st.tabs).parameters:
+    # Tabs that track which one is open, so hidden tabs skip their work
+    tab1, tab2, tab3, tab4 = st.tabs(tab_labels, key='active_tab', on_change='rerun')
+else:
+    tab1, tab2, tab3, tab4 = st.tabs(tab_labels)
+
+def is_open(tab):
+    # None on Streamlit versions without tab state: render everything
+    return getattr(tab, 'open', None) is not False
 
 # TAB 1: OVERVIEW
 with tab1:
-    tot_inc = income_df['amount'].sum()
-    tot_spd = abs(spend_df['amount'].sum())
-    savings = tot_inc - tot_spd
-    rate = (savings / tot_inc * 100) if tot_inc > 0 else 0
-
-    c1, c2, c3, c4 = st.columns(4)
-    c1.metric("Income", f"${tot_inc:,.2f}")
-    c2.metric("Expenses", f"${tot_spd:,.2f}")
-    c3.metric("Net Savings", f"${savings:,.2f}")
-    c4.metric("Savings Rate", f"{rate:.1f}%")
-    st.markdown("---")
-    
-    c1, c2 = st.columns(2)
-    with c1:
-        st.subheader("Spending by Category")
-        cat_grp = spend_df.groupby('category')['amount'].sum().abs().reset_index().sort_values('amount', ascending=False)
-        st.plotly_chart(px.bar(cat_grp, x='category', y='amount', color='category', text_auto='.2s'), use_container_width=True)
-    with c2:
-        st.subheader("Fixed vs Variable")
-        rec_grp = spend_df.groupby('Is_Recurring')['amount'].sum().abs().reset_index()
-        rec_grp['Label'] = rec_grp['Is_Recurring'].map({True: 'Fixed / Recurring', False: 'Discretionary'})
-        st.plotly_chart(px.pie(rec_grp, values='amount', names='Label', hole=0.4), use_container_width=True)
+    if is_open(tab1):
+        (tot_inc, tot_spd, savings, rate), cat_grp, rec_grp = overview_data(*filters)
+
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Income", f"${tot_inc:,.2f}")
+        c2.metric("Expenses", f"${tot_spd:,.2f}")
+        c3.metric("Net Savings", f"${savings:,.2f}")
+        c4.metric("Savings Rate", f"{rate:.1f}%")
+        st.markdown("---")
+
+        c1, c2 = st.columns(2)
+        with c1:
+            st.subheader("Spending by Category")
+            st.plotly_chart(px.bar(cat_grp, x='category', y='amount', color='category', text_auto='.2s'), use_container_width=True, key='overview_categories')
+        with c2:
+            st.subheader("Fixed vs Variable")
+            st.plotly_chart(px.pie(rec_grp, values='amount', names='Label', hole=0.4), use_container_width=True, key='overview_fixed')
 
 # TAB 2: ACCOUNT DEEP DIVE
 with tab2:
-    st.header("📂 Analyze Specific Folders")
-    
-    account_list = sorted(df['Account'].dropna().unique().tolist())
-    selected_account = st.selectbox("Select an Account / Source:", account_list)
-    
-    acct_spend = filtered_df[
-        (filtered_df['Account'] == selected_account) & 
-        (filtered_df['amount'] < 0)
-    ]
-    
-    # --- Main Analysis UI ---
-    if not acct_spend.empty:
-        acct_total = abs(acct_spend['amount'].sum())
-        acct_tx_count = len(acct_spend)
-        avg_tx = acct_total / acct_tx_count
-        
-        c1, c2, c3 = st.columns(3)
-        c1.metric(f"Total Spent in '{selected_account}'", f"${acct_total:,.2f}")
-        c2.metric("Total Transactions", acct_tx_count)
-        c3.metric("Average Purchase", f"${avg_tx:,.2f}")
-        
-        col_chart, col_data = st.columns([2, 1])
-        with col_chart:
-            acct_cat_spend = acct_spend.groupby('category')['amount'].sum().abs().reset_index().sort_values('amount', ascending=False)
-            fig_acct = px.bar(acct_cat_spend, x='category', y='amount', color='category', text_auto='.2s')
-            st.plotly_chart(fig_acct, use_container_width=True)
-            
-        with col_data:
-            st.dataframe(acct_spend[['date', 'description', 'amount', 'category']].sort_values('date', ascending=False), use_container_width=True, hide_index=True)
-    else:
-        st.info(f"No spending found for '{selected_account}' in the current view.")
-
-    # --- Collapsed Debugger ---
-    st.markdown("---")
-    with st.expander("🛠️ Developer Tools / Debugger"):
-        st.write(f"**Selected Account:** `{selected_account}`")
-        
-        debug_df = df[df['Account'] == selected_account]
-        st.write(f"Total Rows in CSV: `{len(debug_df)}`")
-        
-        date_filtered = debug_df[
-            (debug_df['date'].dt.date >= start_date) & 
-            (debug_df['date'].dt.date <= end_date)
-        ]
-        st.write(f"Rows in Date Range: `{len(date_filtered)}`")
-        
-        neg_tx = date_filtered[date_filtered['amount'] < 0]
-        st.write(f"Spending Rows (Negative): `{len(neg_tx)}`")
-
-        if len(date_filtered) > 0 and len(neg_tx) == 0:
-            st.error("🚨 Potential Issue: Transactions found but none are negative (spending).")
-            st.dataframe(date_filtered.head())
+    if is_open(tab2):
+        st.header("📂 Analyze Specific Folders")
+
+        selected_account = st.selectbox("Select an Account / Source:", account_list)
+        acct_total, acct_tx_count, acct_cat_spend, acct_spend = account_data(*filters, selected_account)
+
+        # --- Main Analysis UI ---
+        if acct_tx_count > 0:
+            avg_tx = acct_total / acct_tx_count
+
+            c1, c2, c3 = st.columns(3)
+            c1.metric(f"Total Spent in '{selected_account}'", f"${acct_total:,.2f}")
+            c2.metric("Total Transactions", acct_tx_count)
+            c3.metric("Average Purchase", f"${avg_tx:,.2f}")
+
+            col_chart, col_data = st.columns([2, 1])
+            with col_chart:
+                fig_acct = px.bar(acct_cat_spend, x='category', y='amount', color='category', text_auto='.2s')
+                st.plotly_chart(fig_acct, use_container_width=True, key='account_categories')
+
+            with col_data:
+                st.dataframe(acct_spend, use_container_width=True, hide_index=True)
         else:
-            st.success("✅ Data checks out: Spending transactions detected.")
+            st.info(f"No spending found for '{selected_account}' in the current view.")
+
+        # --- Collapsed Debugger ---
+        st.markdown("---")
+        with st.expander("🛠️ Developer Tools / Debugger"):
+            st.write(f"**Selected Account:** `{selected_account}`")
+
+            total_count, range_count, neg_count, sample = account_checks(store_path, loaded_version, start_date, end_date, selected_account)
+            st.write(f"Total Rows in CSV: `{total_count}`")
+            st.write(f"Rows in Date Range: `{range_count}`")
+            st.write(f"Spending Rows (Negative): `{neg_count}`")
+
+            if range_count > 0 and neg_count == 0:
+                st.error("🚨 Potential Issue: Transactions found but none are negative (spending).")
+                st.dataframe(sample)
+            else:
+                st.success("✅ Data checks out: Spending transactions detected.")
 
 # TAB 3: SAVINGS
 with tab3:
-    st.header("💡 Savings Detective")
-    c1, c2 = st.columns(2)
-    with c1:
-        st.subheader("Recurring Subscriptions")
-        subs = spend_df[(spend_df['Is_Recurring']) & (spend_df['category'].isin(['Subscriptions/Streaming', 'Gym/Health']))]
-        if not subs.empty:
-            st.metric("Total Cost", f"${abs(subs['amount'].sum()):,.2f}")
-            st.dataframe(subs.groupby('description')['amount'].sum().abs().reset_index().sort_values('amount', ascending=False), use_container_width=True, hide_index=True)
-        else:
-            st.success("No subscriptions found.")
-            
-    with c2:
-        st.subheader("Dining & Coffee")
-        dining = spend_df[spend_df['category'].isin(['Dining/Restaurants', 'Coffee', 'Alcohol/Bars'])]
-        val = abs(dining['amount'].sum())
-        st.metric("Total Spent", f"${val:,.2f}")
-        if val > 0: st.warning(f"That's ${val:,.2f} you could potentially reduce.")
-
-    st.markdown("---")
-    st.subheader("🐳 Top 10 Largest Purchases")
-    top = spend_df.sort_values('amount', ascending=True).head(10)[['date','description','amount','category','Account']]
-    top['amount'] = top['amount'].abs()
-    st.dataframe(top.style.format({'amount': '${:,.2f}'}), use_container_width=True, hide_index=True)
+    if is_open(tab3):
+        st.header("💡 Savings Detective")
+        subs, monthly_cost, val, top = savings_data(*filters)
+        c1, c2 = st.columns(2)
+        with c1:
+            st.subheader("Recurring Subscriptions")
+            # Series that were charging during the selected range
+            if not subs.empty:
+                st.metric("Est. Monthly Cost (active)", f"${monthly_cost:,.2f}")
+                st.dataframe(
+                    subs[['merchant', 'Account', 'cadence', 'avg_amount', 'next_date', 'confidence', 'active']]
+                    .style.format({'avg_amount': '${:,.2f}', 'next_date': '{:%Y-%m-%d}', 'confidence': '{:.0%}'}),
+                    use_container_width=True, hide_index=True
+                )
+            else:
+                st.success("No subscriptions found.")
+
+        with c2:
+            st.subheader("Dining & Coffee")
+            st.metric("Total Spent", f"${val:,.2f}")
+            if val > 0: st.warning(f"That's ${val:,.2f} you could potentially reduce.")
+
+        st.markdown("---")
+        st.subheader("🐳 Top 10 Largest Purchases")
+        st.dataframe(top.style.format({'amount': '${:,.2f}'}), use_container_width=True, hide_index=True)
 
 # TAB 4: EXPORTS
 with tab4:
-    st.header("📤 Export Data")
-    c1, c2 = st.columns(2)
+    if is_open(tab4):
+        st.header("📤 Export Data")
+        c1, c2 = st.columns(2)
     
-    with c1:
-        st.subheader("Actual Budget Zip")
-        if st.button("Generate Zip"):
-            buf = io.BytesIO()
-            with zipfile.ZipFile(buf, "w") as zf:
-                for acc in df['Account'].unique():
-                    sub = df[df['Account'] == acc].copy()
-                    exp = pd.DataFrame({
-                        'Date': sub['date'].dt.strftime('%Y-%m-%d'),
-                        'Payee': sub['description'],
-                        'Category': sub['category'],
-                        'Notes': "Imported from bud.get",
-                        'Amount': sub['amount']
-                    })
-                    zf.writestr(f"Import_{acc}.csv", exp.to_csv(index=False))
-            st.download_button("Download Zip", buf.getvalue(), "Actual_Budget_Imports.zip", "application/zip")
+        with c1:
+            st.subheader("Actual Budget Zip")
+            delta = st.checkbox("Only transactions added since the last export", key='export_delta')
+            if st.button("Generate Zip"):
+                from functions.export_budget import export_dir_for, export_actual_zip, mark_exported
+                # Cached per store version on disk, so asking again is instant
+                export_dir = export_dir_for(store_path)
+                data = load_data(store_path, loaded_version)
+                zip_path = export_actual_zip(data, export_dir, loaded_version, delta=delta)
+                if zip_path is None:
+                    st.info("No new transactions since the last export.")
+                else:
+                    with open(zip_path, 'rb') as f:
+                        # Once downloaded, everything in this store counts as exported for the next delta
+                        st.download_button(
+                            "Download Zip", f, "Actual_Budget_Imports.zip", "application/zip",
+                            on_click=mark_exported, args=(data, export_dir)
+                        )
             
-    with c2:
-        st.subheader("Master Backup")
-        st.download_button("Download CSV", df.to_csv(index=False).encode('utf-8'), f"Budget_Backup_{datetime.date.today()}.csv", "text/csv")
\ No newline at end of file
+        with c2:
+            st.subheader("Master Backup")
+            # Only written when asked for, not on every rerun
+            if st.button("Generate Backup"):
+                from functions.export_budget import export_dir_for, export_master_csv
+                backup_path = export_master_csv(load_data(store_path, loaded_version), export_dir_for(store_path), loaded_version)
+                with open(backup_path, 'rb') as f:
+                    st.download_button("Download CSV", f, f"Budget_Backup_{datetime.date.today()}.csv", "text/csv")
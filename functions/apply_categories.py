@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from functions.get_category import RULES, compile_rules, match_category
+from functions.check_recurring import flag_recurring
+from functions.profiler import profile_stage
+
+# Distinct descriptions per task sent to a categorization worker
+DEFAULT_SHARD_SIZE = 20_000
+
+def rules_version():
+    """
+    Short hash of the rule set. Any edit to RULES changes it, which is what
+    invalidates the on-disk category cache.
+    """
+    payload = json.dumps(RULES, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+def normalize_descriptions(descriptions):
+    """
+    The exact form the rules look at: stringified and upper-cased.
+    """
+    return descriptions.astype(object).map(str).str.upper()
+
+def load_category_cache(cache_path):
+    """
+    Loads the description -> category cache. Returns an empty dict if the file
+    is missing, unreadable, or was built with a different rule set.
+    """
+    try:
+        with open(cache_path, encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if cache.get('rules_version') != rules_version():
+        return {}
+    return cache.get('categories', {})
+
+def save_category_cache(cache_path, categories):
+    """
+    Writes the cache next to a temp file first so a crash never leaves it half written.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'rules_version': rules_version(), 'categories': categories}, f)
+    os.replace(tmp_path, cache_path)
+
+# Compiled once per worker process by _init_worker, then reused for every shard it gets
+_worker_rules = None
+
+def _init_worker(rules):
+    global _worker_rules
+    _worker_rules = compile_rules(rules)
+
+def _categorize_shard(descriptions):
+    return [match_category(description, _worker_rules) for description in descriptions]
+
+def categorize_uniques(descriptions, cache, workers=None, shard_size=DEFAULT_SHARD_SIZE):
+    """
+    Adds the category of every description missing from cache (a dict) to it.
+    With workers > 1 the missing descriptions are split into shards and
+    matched on a process pool, where each worker compiles the rules once;
+    shards come back in the order they were sent.
+    """
+    missing = [description for description in descriptions if description not in cache]
+    shards = [missing[start:start + shard_size] for start in range(0, len(missing), shard_size)]
+    if workers and workers > 1 and len(shards) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(RULES,)) as executor:
+            for shard, categories in zip(shards, executor.map(_categorize_shard, shards)):
+                cache.update(zip(shard, categories))
+    else:
+        cache.update((description, match_category(description)) for description in missing)
+
+def apply_categories(df, cache_path=None, workers=None, shard_size=DEFAULT_SHARD_SIZE, cache=None):
+    """
+    Adds 'category' and 'Is_Recurring' to the frame. Descriptions are factorized
+    so the rules run once per distinct merchant string and the results are
+    broadcast back to every row. If cache_path is given, categories are also
+    remembered across runs until the rule set changes. With workers > 1, the
+    distinct descriptions are matched on a process pool (see categorize_uniques).
+    Callers categorizing many frames in a row can load the cache once and pass
+    the dict as cache instead; it is updated in place and saving it is up to them.
+    """
+    categorized = categorize_rows(df, cache_path, workers, shard_size, cache)
+    flag_recurring_rows(df, categorized)
+    return df
+
+def categorize_rows(df, cache_path=None, workers=None, shard_size=DEFAULT_SHARD_SIZE, cache=None):
+    """
+    The first half of apply_categories: sets 'category'. Returns
+    (codes, distinct descriptions, their categories) for flag_recurring_rows.
+    """
+    with profile_stage('categorize', rows_in=len(df)) as stage:
+        codes, uniques = pd.factorize(normalize_descriptions(df['description']))
+
+        owns_cache = cache is None
+        if owns_cache:
+            cache = load_category_cache(cache_path) if cache_path else {}
+        cache_size = len(cache)
+        categorize_uniques(uniques, cache, workers, shard_size)
+        unique_categories = [cache[description] for description in uniques]
+
+        if owns_cache and cache_path and len(cache) != cache_size:
+            save_category_cache(cache_path, cache)
+
+        df['category'] = pd.Series(unique_categories, dtype=object).to_numpy()[codes]
+        stage['rows_out'] = len(df)
+        stage['distinct'] = len(uniques)
+    return codes, uniques, unique_categories
+
+def flag_recurring_rows(df, categorized):
+    """
+    The second half of apply_categories: sets 'Is_Recurring', once per distinct
+    description. categorized is what categorize_rows returned for df.
+    """
+    codes, uniques, unique_categories = categorized
+    with profile_stage('recurring', rows_in=len(df)) as stage:
+        # 'Category_Rule' can override the category per row, so only memoize when it is absent
+        if 'Category_Rule' in df.columns:
+            df['Is_Recurring'] = flag_recurring(df)
+        else:
+            unique_df = pd.DataFrame({'description': uniques, 'category': unique_categories})
+            df['Is_Recurring'] = flag_recurring(unique_df).to_numpy(dtype=bool)[codes]
+        stage['rows_out'] = len(df)
+    return df
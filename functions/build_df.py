@@ -1,14 +1,174 @@
 import os
+import json
+import hashlib
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 from functions.standardize_columns import standardize_columns
-from functions.get_category import get_category
-from functions.check_recurring import check_recurring
+from functions.apply_categories import apply_categories, rules_version, load_category_cache, save_category_cache
+from functions.compact_dtypes import compact_dtypes
+from functions.dedupe_transactions import drop_overlaps
+from functions.schema_registry import (
+    read_typed_csv, load_schema_registry, save_schema_registry, file_layout, remember_layout
+)
+from functions.profiler import profile_stage, profiling_active
+from functions.master_store import ACCOUNT_KEYS
+from functions.file_cache import (
+    load_manifest, save_manifest, file_fingerprint,
+    load_cached_frame, save_cached_frame, prune_cache
+)
 
-def build_current_budget_df(directory) -> pd.DataFrame:
+# Hidden folder inside the data directory for files the pipeline can rebuild
+CACHE_DIR = '.budget_cache'
+
+def find_account_files(abs_root, history=False):
+    """
+    Returns (account_name, newest_csv_path) for every account folder.
+    The path is None when the folder has no CSV files.
+    With history set, returns one pair per CSV instead, oldest first.
+    """
+    account_files = []
+    with os.scandir(abs_root) as entries:
+        for entry in entries:
+            # Skip hidden folders (e.g. CACHE_DIR)
+            if entry.is_dir() and not entry.name.startswith('.'):
+                account_name = entry.name
+                folder_path = entry.path
+                
+                # Look for CSV files in this folder
+                all_files_in_folder = os.listdir(folder_path)
+                csv_files = [os.path.join(folder_path, f) for f in all_files_in_folder if f.lower().endswith('.csv')]
+                if history and csv_files:
+                    account_files.extend((account_name, f) for f in sorted(csv_files, key=os.path.getctime))
+                    continue
+                # If there are csv files, pick the newest one
+                newest_file = max(csv_files, key=os.path.getctime) if csv_files else None
+                account_files.append((account_name, newest_file))
+    return account_files
+
+def load_account_csv(account_name, file_path):
+    """
+    Loads one account's CSV, tags it with the account name and standardizes it.
+    Known bank layouts are read already standardized (see read_typed_csv).
+    """
+    with profile_stage('read_csv', account=account_name) as stage:
+        df = read_typed_csv(file_path, account_name)
+        typed = df is not None
+        if not typed:
+            df = pd.read_csv(file_path, on_bad_lines='skip', index_col=False)
+        stage['rows_out'] = len(df)
+    if typed:
+        return df
+
+    df['Account'] = account_name
+    with profile_stage('standardize', rows_in=len(df), account=account_name) as stage:
+        df = standardize_columns(df)
+        stage['rows_out'] = len(df)
+    return df
+
+def _load_account_in_process(account_name, file_path):
+    # The layout the worker resolved would otherwise never reach the parent's registry
+    return load_account_csv(account_name, file_path), file_layout(file_path)
+
+def load_accounts(account_files, workers=None, use_processes=False):
+    """
+    Runs load_account_csv for each (account_name, file_path) pair.
+    Serial by default; with workers > 1 the files are loaded on a thread pool
+    (or a process pool if use_processes is set). Returns one (df, error) pair
+    per file, in the same order as account_files.
+    """
+    if not workers or workers <= 1:
+        results = []
+        for account_name, file_path in account_files:
+            try:
+                results.append((load_account_csv(account_name, file_path), None))
+            except Exception as e:
+                results.append((None, e))
+        return results
+
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    load = _load_account_in_process if use_processes else load_account_csv
+    with executor_class(max_workers=workers) as executor:
+        futures = [executor.submit(load, account_name, file_path) for account_name, file_path in account_files]
+
+    results = []
+    for future in futures:
+        error = future.exception()
+        if error:
+            results.append((None, error))
+        elif use_processes:
+            df, found = future.result()
+            remember_layout(found)
+            results.append((df, None))
+        else:
+            results.append((future.result(), None))
+    return results
+
+def read_account_cache(cache_dir, manifest, account_name, file_path, categories=None):
+    """
+    Looks the file up in the cache. Returns (df, fingerprint), where df is None
+    if the file has to be re-read. A cached frame built with older rules is
+    re-categorized here without re-reading the CSV; categories is the build's
+    category cache dict (see apply_categories).
+    """
+    entry = manifest.get(file_path)
+    try:
+        fingerprint = file_fingerprint(file_path, entry)
+    except OSError:
+        # Let the normal load report the problem
+        return None, None
+
+    df = load_cached_frame(cache_dir, entry, fingerprint, account_name)
+    if df is None:
+        return None, fingerprint
+
+    if entry.get('rules_version') != rules_version():
+        df = apply_categories(df, cache=categories)
+        write_account_cache(cache_dir, manifest, account_name, file_path, fingerprint, df)
+    else:
+        print(f"[{account_name}] Unchanged, loaded from cache.")
+        # Refresh size/mtime so a touched-but-identical file is not re-hashed next time
+        manifest[file_path] = {**entry, **fingerprint}
+    return df, fingerprint
+
+def write_account_cache(cache_dir, manifest, account_name, file_path, fingerprint, df):
+    manifest[file_path] = {
+        **fingerprint,
+        'account': account_name,
+        'rules_version': rules_version(),
+        'frame': save_cached_frame(cache_dir, file_path, df),
+    }
+
+def account_keys(sources, history=False):
+    """
+    {account: key} for what each account's rows were built from: the content
+    hash of every file (in load order), the rules version and the history flag.
+    sources holds (account_name, file_path, fingerprint) per file that went in.
+    Accounts with a file that has no fingerprint are left out.
+    """
+    files = {}
+    for account_name, file_path, fingerprint in sources:
+        files.setdefault(account_name, []).append([file_path, fingerprint['sha256'] if fingerprint else None])
+    return {
+        account_name: hashlib.sha256(json.dumps([rules_version(), history, account_files]).encode('utf-8')).hexdigest()[:16]
+        for account_name, account_files in files.items()
+        if all(sha256 for _, sha256 in account_files)
+    }
+
+def build_current_budget_df(directory, category_cache=None, cache_dir=None, workers=None, use_processes=False, history=False) -> pd.DataFrame:
     """
     Scans the directory for account folders. In each folder, finds the 
     most recent .csv, loads it, tags it, and merges all into one DataFrame.
+    If category_cache is a file path, categories are remembered there across runs.
+    If cache_dir is given, each file's processed frame is cached there and only
+    new or changed files are re-read, standardized and categorized.
+    With workers > 1, files are loaded and standardized in parallel; the result
+    is the same as the serial path. With use_processes, categorization of large
+    files is spread over the same number of processes.
+    With history set, every CSV in each folder is loaded, and transactions that
+    overlapping exports share are kept once (see drop_overlaps).
+    With cache_dir, the result's attrs also carry account_keys(), so
+    save_master can leave the accounts that did not change alone.
     """
     all_dataframes = []
     abs_root = os.path.abspath(directory)
@@ -19,36 +179,84 @@ def build_current_budget_df(directory) -> pd.DataFrame:
     
     print(f"Scanning directory: {abs_root}\n")
 
-    with os.scandir(abs_root) as entries:
-        for entry in entries:
-            if entry.is_dir():
-                account_name = entry.name
-                folder_path = entry.path
-                
-                # Look for CSV files in this folder
-                all_files_in_folder = os.listdir(folder_path)
-                csv_files = [os.path.join(folder_path, f) for f in all_files_in_folder if f.lower().endswith('.csv')]
-                # If there are csv files, pick the newest one
-                if csv_files:
-                    newest_file = max(csv_files, key=os.path.getctime)
-                    print(f"[{account_name}] Found: {os.path.basename(newest_file)}")
-                    # Load the CSV then clean it up
-                    try:
-                        df = pd.read_csv(newest_file, on_bad_lines='skip', index_col=False)
-                        df['Account'] = account_name
-                        df = standardize_columns(df)
-                        all_dataframes.append(df)
-                    except Exception as e:
-                        print(f"  Error reading {newest_file}: {e}")
-                else:
-                    print(f"[{account_name}] No CSV files found.")
+    with profile_stage('scan'):
+        found_files = find_account_files(abs_root, history)
+
+    account_files = []
+    for account_name, newest_file in found_files:
+        if newest_file is None:
+            print(f"[{account_name}] No CSV files found.")
+        else:
+            print(f"[{account_name}] Found: {os.path.basename(newest_file)}")
+            account_files.append((account_name, newest_file))
+
+    # Loaded once and saved once after every file is categorized
+    categories = load_category_cache(category_cache) if category_cache else {}
+    categories_size = len(categories)
+
+    # Answer what we can from the cache
+    manifest = load_manifest(cache_dir) if cache_dir else {}
+    if cache_dir:
+        load_schema_registry(cache_dir)
+    cached = {file_path: (None, None) for _, file_path in account_files}
+    if cache_dir:
+        for account_name, file_path in account_files:
+            with profile_stage('cache_lookup', account=account_name) as stage:
+                cached[file_path] = read_account_cache(cache_dir, manifest, account_name, file_path, categories)
+                stage['rows_out'] = len(cached[file_path][0]) if cached[file_path][0] is not None else 0
+
+    # Load the CSVs then clean them up
+    to_load = [(account_name, file_path) for account_name, file_path in account_files if cached[file_path][0] is None]
+    loaded = dict(zip([file_path for _, file_path in to_load], load_accounts(to_load, workers, use_processes)))
+
+    sources = []
+    for account_name, file_path in account_files:
+        if file_path not in loaded:
+            all_dataframes.append(cached[file_path][0])
+            sources.append((account_name, file_path, cached[file_path][1]))
+            continue
+
+        df, error = loaded[file_path]
+        if error is not None:
+            print(f"  Error reading {file_path}: {error}")
+            continue
+
+        # Large files (e.g. a first full-history build) also match their descriptions on the pool
+        df = apply_categories(df, workers=workers if use_processes else None, cache=categories)
+        fingerprint = cached[file_path][1]
+        if cache_dir and fingerprint:
+            write_account_cache(cache_dir, manifest, account_name, file_path, fingerprint, df)
+        all_dataframes.append(df)
+        sources.append((account_name, file_path, fingerprint))
+
+    if category_cache and len(categories) != categories_size:
+        save_category_cache(category_cache, categories)
+
+    if cache_dir:
+        prune_cache(cache_dir, manifest, [file_path for _, file_path in account_files])
+        save_manifest(cache_dir, manifest)
+        save_schema_registry(cache_dir)
+
+    if history and all_dataframes:
+        with profile_stage('dedupe', rows_in=sum(len(df) for df in all_dataframes)) as stage:
+            all_dataframes, dropped = drop_overlaps(all_dataframes)
+            stage['rows_out'] = sum(len(df) for df in all_dataframes)
+        print(f"Dropped {dropped} overlapping rows across exports.")
 
     if all_dataframes:
-        master_df = pd.concat(all_dataframes, ignore_index=True)
-        print(f"Applying Categories to {len(master_df)} total rows...\n")
-        master_df['category'] = master_df.apply(get_category, axis=1)
-        master_df['Is_Recurring'] = master_df.apply(check_recurring, axis=1)
+        with profile_stage('concat', rows_in=sum(len(df) for df in all_dataframes)) as stage:
+            master_df = pd.concat(all_dataframes, ignore_index=True)
+            stage['rows_out'] = len(master_df)
+        print(f"Categorized {len(master_df)} total rows.")
+
+        with profile_stage('compact', rows_in=len(master_df)) as stage:
+            # The footprint report walks every string, so only when profiling
+            master_df = compact_dtypes(master_df, report=profiling_active())
+            stage['rows_out'] = len(master_df)
+        if cache_dir:
+            master_df.attrs[ACCOUNT_KEYS] = account_keys(sources, history)
+        print()
         return master_df
     else:
         print("No data found in any subdirectory.")
-        return pd.DataFrame()  
\ No newline at end of file
+        return pd.DataFrame()  
@@ -1,5 +1,18 @@
+import re
 import pandas as pd
 
+# Inherently Recurring Categories
+RECURRING_CATEGORIES = [
+    'Mortgage/Rent', 
+    'Utilities', 
+    'Subscriptions/Streaming', 
+    'Gym/Health',
+    'Loan/Credit Card Payment'
+]
+
+RECURRING_KEYWORDS = ['AUTOPAY', 'RECURRING', 'BILL PAY', 'INSURANCE', 'PPD ID']
+RECURRING_PATTERN = re.compile('|'.join(re.escape(keyword) for keyword in RECURRING_KEYWORDS))
+
 def check_recurring(row):
     """
     Determines if a transaction is likely recurring.
@@ -11,22 +24,29 @@ def check_recurring(row):
     
     description = str(row['description']).upper()
     
-    # Inherently Recurring Categories
-    recurring_categories = [
-        'Mortgage/Rent', 
-        'Utilities', 
-        'Subscriptions/Streaming', 
-        'Gym/Health',
-        'Loan/Credit Card Payment'
-    ]
-    
-    if current_category in recurring_categories:
+    if current_category in RECURRING_CATEGORIES:
         return True
         
-    recurring_keywords = ['AUTOPAY', 'RECURRING', 'BILL PAY', 'INSURANCE', 'PPD ID']
-    
-    for keyword in recurring_keywords:
+    for keyword in RECURRING_KEYWORDS:
         if keyword in description:
             return True
             
-    return False
\ No newline at end of file
+    return False
+
+def flag_recurring(df):
+    """
+    Column-level check_recurring: computes Is_Recurring for the whole frame at once.
+    """
+    def column_as_str(col_name):
+        if col_name in df.columns:
+            return df[col_name].astype(object).map(str)
+        return pd.Series('', index=df.index, dtype=object)
+
+    cat_rule = column_as_str('Category_Rule')
+    cat_orig = column_as_str('category')
+
+    current_category = cat_rule.where((cat_rule != 'nan') & (cat_rule != ''), cat_orig)
+
+    description = df['description'].astype(object).map(str).str.upper()
+
+    return current_category.isin(RECURRING_CATEGORIES) | description.str.contains(RECURRING_PATTERN)
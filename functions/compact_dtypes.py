@@ -0,0 +1,52 @@
+import pandas as pd
+
+# Columns with few distinct values compared to rows
+CATEGORICAL_COLUMNS = ['category', 'Account', 'description']
+
+def memory_footprint(df):
+    """
+    Deep memory usage in bytes (counts the Python strings behind object columns).
+    """
+    return int(df.memory_usage(deep=True).sum())
+
+def parse_dates(dates):
+    """
+    Parses the date column. Each bank is consistent on its own, but the merged
+    column can mix formats (e.g. 01/31/2024 and 2024-01-31), so fall back to
+    per-element parsing only when a single inferred format does not fit.
+    """
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates
+    try:
+        return pd.to_datetime(dates)
+    except (ValueError, TypeError):
+        return pd.to_datetime(dates, format='mixed', errors='coerce')
+
+def compact_dtypes(df, report=False):
+    """
+    Converts the master frame to its compact schema in place and returns it:
+    datetime64 date, categorical category/Account/description, float64 amount
+    and bool Is_Recurring. Amounts stay float64 because float32 values show
+    up as e.g. 123.449997 in the dashboard tables.
+    If report is set, prints the memory footprint before and after.
+    """
+    before = memory_footprint(df) if report else 0
+
+    if 'date' in df.columns:
+        df['date'] = parse_dates(df['date'])
+
+    if 'amount' in df.columns and df['amount'].dtype != 'float64':
+        df['amount'] = pd.to_numeric(df['amount'], errors='coerce').astype('float64')
+
+    for col_name in CATEGORICAL_COLUMNS:
+        if col_name in df.columns and not isinstance(df[col_name].dtype, pd.CategoricalDtype):
+            df[col_name] = df[col_name].astype('category')
+
+    if 'Is_Recurring' in df.columns and df['Is_Recurring'].dtype != bool:
+        df['Is_Recurring'] = df['Is_Recurring'].eq(True)
+
+    if report:
+        after = memory_footprint(df)
+        saved = (1 - after / before) * 100 if before else 0
+        print(f"Memory footprint: {before / 1e6:,.2f} MB -> {after / 1e6:,.2f} MB ({saved:.0f}% smaller)")
+    return df
@@ -0,0 +1,64 @@
+import pandas as pd
+
+from functions.spending_cube import slice_cube, sum_by
+from functions.detect_recurring import CADENCES
+
+# Categories the Savings tab adds up as "Dining & Coffee"
+DINING_CATEGORIES = ['Dining/Restaurants', 'Coffee', 'Alcohol/Bars']
+
+# Pure functions behind the dashboard panels: each takes the pre-aggregated
+# cube (or the recurring table) plus the filter state and returns small frames
+# and numbers, so the dashboard can cache them per filter state.
+
+def spending_view(cube, start_date, end_date, exclude_categories=()):
+    """
+    (filtered cube, its spending rows) for the sidebar filters.
+    """
+    view = slice_cube(cube, start_date, end_date, exclude_categories)
+    return view, view[view['sign'] < 0]
+
+def overview_totals(view):
+    """
+    Income, expenses, net savings and savings rate (%) of a filtered cube.
+    """
+    income = view.loc[view['sign'] > 0, 'amount'].sum()
+    expenses = abs(view.loc[view['sign'] < 0, 'amount'].sum())
+    savings = income - expenses
+    rate = (savings / income * 100) if income > 0 else 0
+    return income, expenses, savings, rate
+
+def fixed_vs_variable(spend):
+    """
+    Spending split into recurring and discretionary, labelled for the pie chart.
+    """
+    grouped = spend.groupby('Is_Recurring')['amount'].sum().abs().reset_index()
+    grouped['Label'] = grouped['Is_Recurring'].map({True: 'Fixed / Recurring', False: 'Discretionary'})
+    return grouped
+
+def account_breakdown(spend, account):
+    """
+    (total spent, transaction count, spending per category) for one account.
+    """
+    acct = spend[spend['Account'] == account]
+    return abs(acct['amount'].sum()), int(acct['count'].sum()), sum_by(acct, 'category')
+
+def category_spend(spend, categories):
+    """
+    Total spent (positive) in the given categories.
+    """
+    return abs(spend.loc[spend['category'].isin(categories), 'amount'].sum())
+
+def subscriptions_in_range(recurring, start_date, end_date, exclude_categories=()):
+    """
+    Recurring series that were charging during the range, and the estimated
+    monthly cost of the ones that still look active.
+    """
+    if recurring.empty:
+        return recurring, 0.0
+    subs = recurring[
+        (recurring['first_date'] <= pd.Timestamp(end_date)) & (recurring['last_date'] >= pd.Timestamp(start_date))
+        & ~recurring['category'].isin(exclude_categories)
+    ]
+    active = subs[subs['active']]
+    per_month = active['avg_amount'] * 30.44 / active['cadence'].map(lambda name: CADENCES[name][0])
+    return subs, float(per_month.sum())
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+def sort_by_date(df):
+    """
+    Returns the frame sorted by date (stable, NaT last). Already sorted frames
+    are returned as-is, so calling this on the saved store costs one pass.
+    """
+    if df['date'].is_monotonic_increasing:
+        return df
+    return df.sort_values('date', kind='stable')
+
+def date_bounds(dates, start_date, end_date):
+    """
+    Binary-searches sorted datetime64 values for start_date <= date <= end_date
+    (whole days). Returns (lo, hi) positions for an iloc slice.
+    """
+    dates = np.asarray(dates)
+    start = pd.Timestamp(start_date).normalize().to_datetime64().astype(dates.dtype)
+    end = (pd.Timestamp(end_date).normalize() + pd.Timedelta(days=1)).to_datetime64().astype(dates.dtype)
+    return dates.searchsorted(start, side='left'), dates.searchsorted(end, side='left')
+
+def date_slice(df, start_date, end_date):
+    """
+    Rows of a date-sorted frame inside the range, as an iloc slice (no mask, no copy).
+    """
+    lo, hi = date_bounds(df['date'].to_numpy(), start_date, end_date)
+    return df.iloc[lo:hi]
+
+def category_mask(categories, exclude_categories):
+    """
+    Boolean mask of rows whose category is not excluded. For categorical columns
+    the excluded names are resolved to codes once and compared as integers.
+    """
+    if isinstance(categories.dtype, pd.CategoricalDtype):
+        excluded_codes = categories.cat.categories.get_indexer(list(exclude_categories))
+        return ~np.isin(categories.cat.codes.to_numpy(), excluded_codes[excluded_codes >= 0])
+    return ~categories.isin(exclude_categories).to_numpy()
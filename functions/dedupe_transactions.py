@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from functions.compact_dtypes import parse_dates
+
+def transaction_keys(df):
+    """
+    Stable 64-bit hash per row over (Account, day, amount to the cent,
+    normalized description, occurrence index). The occurrence index counts
+    identical rows within the same file, so two real $5 coffees on one day
+    stay two rows, while the same coffee in two overlapping exports is one.
+    """
+    descriptions = (
+        df['description'].astype(object).map(str)
+        .str.upper().str.replace(r'\s+', ' ', regex=True).str.strip()
+    )
+    base = pd.util.hash_pandas_object(pd.DataFrame({
+        'Account': df['Account'].astype(object).map(str).values,
+        'date': parse_dates(df['date']).dt.normalize().values,
+        'amount': pd.to_numeric(df['amount'], errors='coerce').round(2).values,
+        'description': descriptions.values,
+    }), index=False).values
+
+    occurrence = pd.Series(base).groupby(base, sort=False).cumcount().values
+    return pd.util.hash_pandas_object(
+        pd.DataFrame({'key': base, 'occurrence': occurrence}), index=False
+    ).values
+
+def drop_overlaps(frames):
+    """
+    Takes one frame per export file (oldest first) and drops the rows an
+    earlier file already covered. All keys are hashed up front and joined in
+    one duplicated() pass, so this is linear in the total number of rows.
+    Returns (frames, number of rows dropped).
+    """
+    if not frames:
+        return frames, 0
+
+    keys = np.concatenate([transaction_keys(df) for df in frames])
+    keep = ~pd.Series(keys).duplicated().values
+
+    deduped = []
+    offset = 0
+    for df in frames:
+        frame_keep = keep[offset:offset + len(df)]
+        offset += len(df)
+        deduped.append(df if frame_keep.all() else df[frame_keep])
+    return deduped, int((~keep).sum())
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+# cadence -> (typical gap in days, allowed deviation in days, charges needed to call it)
+CADENCES = {
+    'weekly': (7, 1, 4),
+    'monthly': (30.44, 4, 3),
+    'annual': (365.25, 15, 2),
+}
+CADENCE_OFFSETS = {
+    'weekly': pd.DateOffset(weeks=1),
+    'monthly': pd.DateOffset(months=1),
+    'annual': pd.DateOffset(years=1),
+}
+MIN_CONFIDENCE = 0.6
+# Most a series' amounts may vary (std / mean) and still count as recurring;
+# a regular merchant with varying amounts (groceries, gas) is not a subscription
+MAX_AMOUNT_SPREAD = 0.25
+RECURRING_COLUMNS = [
+    'Account', 'merchant', 'category', 'cadence', 'charges', 'avg_amount',
+    'first_date', 'last_date', 'next_date', 'confidence', 'active',
+]
+
+def normalize_merchants(descriptions):
+    """
+    Strips the parts of a description that change between charges of the same
+    merchant (store numbers, reference ids, phone numbers, punctuation), e.g.
+    'NETFLIX.COM 866-579-7172 CA' -> 'NETFLIX COM CA'. Runs once per distinct description.
+    """
+    codes, uniques = pd.factorize(descriptions.astype(object).map(str).str.upper())
+    merchants = (
+        pd.Series(uniques, dtype=object)
+        .str.replace(r'[*#]', ' ', regex=True)
+        .str.replace(r'\S*\d\S*', ' ', regex=True)
+        .str.replace(r'[^A-Z&]+', ' ', regex=True)
+        .str.strip()
+    )
+    # Blank descriptions are no merchant at all
+    return np.where(descriptions.isna().to_numpy(), '', merchants.to_numpy()[codes])
+
+def detect_recurring(df, min_confidence=MIN_CONFIDENCE):
+    """
+    Finds repeating charges per (Account, merchant) from their timing and size
+    rather than their category. Several charges on one day count once.
+    Each series gets the cadence (weekly, monthly, annual) closest to its
+    median gap, and a confidence: the share of gaps on that cadence, times
+    amount consistency, scaled down for short series. Series whose amounts
+    vary by more than MAX_AMOUNT_SPREAD are left out whatever their timing.
+    Returns one row per series at or above min_confidence, with the predicted
+    next charge and whether it still looks active.
+    """
+    spend = df[df['amount'] < 0]
+    charges = pd.DataFrame({
+        'Account': spend['Account'].astype(object).to_numpy(),
+        'merchant': normalize_merchants(spend['description']),
+        'category': spend['category'].astype(object).to_numpy(),
+        'date': spend['date'].dt.normalize().to_numpy(),
+        'amount': spend['amount'].abs().to_numpy(),
+    })
+    charges = charges[(charges['merchant'] != '') & charges['date'].notna()]
+    if charges.empty:
+        return pd.DataFrame(columns=RECURRING_COLUMNS)
+
+    # One row per charge day, sorted so each series is a contiguous run
+    daily = (
+        charges.groupby(['Account', 'merchant', 'date'], sort=True)
+        .agg(amount=('amount', 'sum'), category=('category', 'first'))
+        .reset_index()
+    )
+    series = daily.groupby(['Account', 'merchant'], sort=True).ngroup().to_numpy()
+    gaps = daily['date'].diff().dt.days.to_numpy(dtype='float64')
+    gaps[np.r_[True, series[1:] != series[:-1]]] = np.nan
+    daily['series'] = series
+    daily['gap'] = gaps
+
+    stats = daily.groupby('series').agg(
+        Account=('Account', 'first'),
+        merchant=('merchant', 'first'),
+        category=('category', 'first'),
+        charges=('date', 'size'),
+        avg_amount=('amount', 'mean'),
+        amount_std=('amount', 'std'),
+        median_gap=('gap', 'median'),
+        first_date=('date', 'min'),
+        last_date=('date', 'max'),
+    )
+
+    # Nearest cadence by median gap
+    names = np.array(list(CADENCES), dtype=object)
+    periods, tolerances, needed = (np.array(values, dtype='float64') for values in zip(*CADENCES.values()))
+    median_gap = stats['median_gap'].to_numpy()
+    nearest = np.abs(median_gap[:, None] - periods[None, :]).argmin(axis=1)
+    stats['cadence'] = names[nearest]
+
+    # Share of each series' gaps that land on its cadence
+    row_cadence = nearest[series]
+    on_time = np.abs(gaps - periods[row_cadence]) <= tolerances[row_cadence]
+    regularity = pd.Series(np.where(np.isnan(gaps), np.nan, on_time)).groupby(series).mean().to_numpy()
+
+    amount_spread = (stats['amount_std'].fillna(0) / stats['avg_amount']).clip(upper=1).to_numpy()
+    length = np.minimum(1, stats['charges'].to_numpy() / (needed[nearest] + 1))
+    confidence = regularity * (0.6 + 0.4 * (1 - amount_spread)) * length
+    stats['confidence'] = np.nan_to_num(confidence).round(2)
+
+    keep = (
+        (stats['charges'].to_numpy() >= needed[nearest])
+        & (np.abs(median_gap - periods[nearest]) <= tolerances[nearest])
+        & (stats['confidence'].to_numpy() >= min_confidence)
+        & (amount_spread <= MAX_AMOUNT_SPREAD)
+    )
+    stats = stats[keep]
+
+    stats['next_date'] = stats['last_date']
+    for name, offset in CADENCE_OFFSETS.items():
+        is_cadence = stats['cadence'] == name
+        stats.loc[is_cadence, 'next_date'] = stats.loc[is_cadence, 'last_date'] + offset
+
+    # Still running if the next charge is not overdue by more than half a period
+    grace = pd.to_timedelta(stats['cadence'].map(lambda name: CADENCES[name][0] / 2), unit='D')
+    stats['active'] = stats['next_date'] + grace >= df['date'].max()
+
+    stats = stats.sort_values(['confidence', 'avg_amount'], ascending=False, kind='stable')
+    return stats[RECURRING_COLUMNS].reset_index(drop=True)
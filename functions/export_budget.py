@@ -0,0 +1,119 @@
+import io
+import os
+import glob
+import zipfile
+import numpy as np
+import pandas as pd
+
+from functions.build_df import CACHE_DIR
+from functions.dedupe_transactions import transaction_keys
+
+EXPORTS_DIR = 'exports'
+# Keys of every transaction in the last export that was downloaded
+EXPORTED_KEYS = 'exported_keys.npy'
+# Rows per to_csv call, so only one chunk of CSV text is in memory at a time
+CHUNK_ROWS = 50_000
+
+def export_dir_for(store_path):
+    """
+    Where the generated exports for a master store are kept (.budget_cache/exports next to it).
+    """
+    return os.path.join(os.path.dirname(store_path), CACHE_DIR, EXPORTS_DIR)
+
+def _write_csv(frame, stream):
+    for start in range(0, len(frame), CHUNK_ROWS):
+        frame.iloc[start:start + CHUNK_ROWS].to_csv(stream, index=False, header=start == 0)
+    if frame.empty:
+        frame.to_csv(stream, index=False)
+
+def _actual_budget_frame(df):
+    return pd.DataFrame({
+        'Date': df['date'].dt.strftime('%Y-%m-%d'),
+        'Payee': df['description'],
+        'Category': df['category'],
+        'Notes': "Imported from bud.get",
+        'Amount': df['amount'],
+    })
+
+def _artifact(export_dir, kind, tag, extension, build):
+    """
+    Returns the cached file for (kind, tag), building it first if it is
+    missing. Older files of the same kind are removed once the new one is in.
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    path = os.path.join(export_dir, f"{kind}_{tag}{extension}")
+    if os.path.exists(path):
+        return path
+
+    tmp_path = f"{path}.tmp"
+    build(tmp_path)
+    os.replace(tmp_path, path)
+    for old in glob.glob(os.path.join(export_dir, f"{kind}_*")):
+        if old != path and not old.endswith('.tmp'):
+            os.remove(old)
+    return path
+
+def write_actual_zip(df, path):
+    """
+    Writes one Actual Budget import CSV per account into a zip. The frame is
+    split by account in a single groupby pass and each CSV is streamed into
+    its zip entry chunk by chunk.
+    """
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for account, sub in df.groupby('Account', sort=False, observed=True):
+            with zf.open(f"Import_{account}.csv", 'w') as entry:
+                with io.TextIOWrapper(entry, encoding='utf-8', newline='') as stream:
+                    _write_csv(_actual_budget_frame(sub), stream)
+    return path
+
+def load_exported_keys(export_dir):
+    try:
+        return np.load(os.path.join(export_dir, EXPORTED_KEYS))
+    except (OSError, ValueError):
+        return np.array([], dtype=np.uint64)
+
+def mark_exported(df, export_dir):
+    """
+    Records every transaction in df as exported, so the next delta export starts after them.
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    keys_path = os.path.join(export_dir, EXPORTED_KEYS)
+    tmp_path = f"{keys_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, np.unique(transaction_keys(df)))
+    os.replace(tmp_path, keys_path)
+
+def new_transactions(df, export_dir):
+    """
+    Rows of df that were not in the last downloaded export (all rows if there was none).
+    """
+    exported = load_exported_keys(export_dir)
+    if not len(exported):
+        return df
+    return df[~np.isin(transaction_keys(df), exported)]
+
+def export_actual_zip(df, export_dir, version, delta=False):
+    """
+    Path of the Actual Budget zip for this store version, generated on the
+    first call and reused after that. With delta set, the zip only holds the
+    transactions added since the last export (None if there are none).
+    """
+    if not delta:
+        return _artifact(export_dir, 'actual', version, '.zip', lambda path: write_actual_zip(df, path))
+
+    keys_path = os.path.join(export_dir, EXPORTED_KEYS)
+    # The delta also depends on what was exported last
+    since = os.stat(keys_path).st_mtime_ns if os.path.exists(keys_path) else 0
+    new = new_transactions(df, export_dir)
+    if new.empty:
+        return None
+    return _artifact(export_dir, 'delta', f"{version}_{since}", '.zip', lambda path: write_actual_zip(new, path))
+
+def export_master_csv(df, export_dir, version):
+    """
+    Path of the full CSV backup for this store version, written in chunks and reused after that.
+    """
+    def build(path):
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            _write_csv(df, f)
+    return _artifact(export_dir, 'backup', version, '.csv', build)
@@ -0,0 +1,80 @@
+import hashlib
+import json
+import os
+import pandas as pd
+
+MANIFEST_NAME = 'manifest.json'
+FRAMES_DIR = 'frames'
+
+def load_manifest(cache_dir):
+    """
+    Loads the per-file manifest: {abs csv path: {size, mtime_ns, sha256, account, rules_version, frame}}.
+    A missing or corrupt manifest just means everything gets rebuilt.
+    """
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(cache_dir, manifest):
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest_path = os.path.join(cache_dir, MANIFEST_NAME)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+def hash_file(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def file_fingerprint(file_path, previous=None):
+    """
+    Size + mtime + content hash. If size and mtime match the previous entry the
+    file is trusted without re-hashing, which keeps a no-change rebuild cheap.
+    """
+    stat = os.stat(file_path)
+    fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    if previous and previous.get('size') == stat.st_size and previous.get('mtime_ns') == stat.st_mtime_ns:
+        fingerprint['sha256'] = previous.get('sha256')
+    else:
+        fingerprint['sha256'] = hash_file(file_path)
+    return fingerprint
+
+def load_cached_frame(cache_dir, entry, fingerprint, account_name):
+    """
+    Returns the cached processed frame if the file content and account still match, else None.
+    """
+    if not entry or entry.get('sha256') != fingerprint['sha256'] or entry.get('account') != account_name:
+        return None
+    try:
+        return pd.read_pickle(os.path.join(cache_dir, FRAMES_DIR, entry['frame']))
+    except Exception:
+        # An unreadable cache entry is just a cache miss
+        return None
+
+def save_cached_frame(cache_dir, file_path, df):
+    """
+    Pickles a processed frame and returns its file name inside the frames folder.
+    """
+    frames_dir = os.path.join(cache_dir, FRAMES_DIR)
+    os.makedirs(frames_dir, exist_ok=True)
+    frame_name = hashlib.sha1(file_path.encode('utf-8')).hexdigest() + '.pkl'
+    df.to_pickle(os.path.join(frames_dir, frame_name))
+    return frame_name
+
+def prune_cache(cache_dir, manifest, seen_paths):
+    """
+    Drops manifest entries (and their frames) for files that no longer exist.
+    """
+    for file_path in set(manifest) - set(seen_paths):
+        entry = manifest.pop(file_path)
+        try:
+            os.remove(os.path.join(cache_dir, FRAMES_DIR, entry['frame']))
+        except (OSError, KeyError):
+            pass
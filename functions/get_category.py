@@ -1,96 +1,141 @@
+import json
+import os
 import re
-import pandas as pd
 
-def get_category(row):
+# --- RULE SET ---
+# Loaded from functions/rules.json: a list of {"category": ..., "keywords": [...]}.
+# Priority is top-to-bottom (just like an IFS formula).
+# Set BUDGET_RULES to the path of your own file to use it instead.
+RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules.json')
+RULES_ENV = 'BUDGET_RULES'
+# Keywords this short match inside too many unrelated descriptions
+BROAD_KEYWORD_LENGTH = 3
+
+
+def rules_path():
+    return os.environ.get(RULES_ENV) or RULES_FILE
+
+
+def load_rules(path=None):
     """
-    Applies regex rules to categorize a transaction based on its description.
-    Priority is top-to-bottom (just like an IFS formula).
+    Reads a rules file into [(category, [keywords])]. Keywords are upper-cased
+    because descriptions are matched upper-cased. Raises ValueError with the
+    file name when the file is not in the expected shape.
+    """
+    path = path or rules_path()
+    with open(path, encoding='utf-8') as f:
+        try:
+            data = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"{path}: not valid JSON ({e})") from e
+
+    rules = []
+    for index, rule in enumerate(data if isinstance(data, list) else [None]):
+        if (not isinstance(rule, dict) or not isinstance(rule.get('category'), str)
+                or not isinstance(rule.get('keywords'), list)
+                or not all(isinstance(keyword, str) and keyword for keyword in rule['keywords'])):
+            raise ValueError(f"{path}: rule {index + 1} must look like {{\"category\": \"...\", \"keywords\": [\"...\"]}}")
+        rules.append((rule['category'], [keyword.upper() for keyword in rule['keywords']]))
+    return rules
+
+
+def check_rules(rules):
     """
-    description = str(row['description']).upper() # specific formatting
-    amount = row['amount'] if pd.notnull(row['amount']) else 0
-    
-    # --- RULE SET ---
-    # format: (Category Name, [List of Keywords])
-    rules = [
-        # 1. INCOME & DEPOSITS (Check strictly for Credit/Payroll first)
-        ('Income/Payroll', [
-            'RIVIAN AUTOMOTIV PAYROLL', 'CAREFUSION', 'DIRECT DEP', 'RESILIENT', 
-            'DEPOSIT', 'REFUND', 'IRS TREAS', '9424300002'
-        ]),
-        
-        # 2. TRANSFERS & PAYMENTS (Money moving around, not spending)
-        ('Loan/Credit Card Payment', [
-            'CHASE CREDIT CRD', 'CITI CARD ONLINE', 'PAYMENT TO CHASE', 'AUTOPAY',
-            'EARNEST', 'NORTHWESTERN MU', 'ADVS ED SERV', 'MERCURY INS', 
-            'AUTO LOAN', 'STUDNTLOAN', 'BARCLAYCARD'
-        ]),
-        ('Transfer to Savings', ['TRANSFER TO SAV']),
-        ('Transfers/P2P', [
-            'ONLINE TRANSFER', 'ZELLE', 'VENMO', 'PAYPAL', 'WIRE TRANSFER', 
-            'ACCT_XFER', 'QUICKPAY'
-        ]),
-        ('Cash Withdrawal', ['ATM WITHDRAWAL', 'CASH WITHDRAWAL', 'ATM WDL', 'ATM']),
-        
-        # 3. MAJOR BILLS
-        ('Mortgage/Rent', ['JPMORGAN CHASE', 'MORTGAGE', 'RENT', 'HOA', 'QUAIL RIDGE']),
-        ('Utilities', ['SD GAS & ELEC', 'COX COMM', 'WATER', 'WASTE', 'SOLAR']),
-        ('Subscriptions/Streaming', [
-            'NETFLIX', 'HULU', 'SPOTIFY', 'DISNEY', 'HBO', 'YOUTUBE', 
-            'PEACOCK', 'AUDIBLE', 'PRIME VIDEO', 'APPLE.COM', 'GOOGLE *', 'AUTOMATIC PAYMENT'
-        ]),
-
-        # 4. DISCRETIONARY SPENDING
-        ('Groceries', [
-            'TRADER JOE', 'COSTCO WHSE', 'SPROUTS', 'RALPHS', 'VONS', 'ALBERTSONS', 
-            'WHOLE FOODS', '88 RANCH', 'LAZY ACRES', 'FARMERS MARKET', 'CREAM OF',
-            'FRAIZER FARMS', 'NATURAL GROCERS', 'GROCERY OUTLET', 'WORLD MARKET',
-            'BABA NATURAL'
-        ]),
-        ('Amazon', ['AMAZON', 'AMZN']), 
-        ('Dining/Restaurants', [
-            'RIVIAN CAFE', 'IN-N-OUT', 'CHIPOTLE', 'BURGER', 'PIZZA', 'TACO', 
-            'RAMEN', 'SUSHI', 'GRILL', 'CAFE', 'BISTRO', 'DINER', 'PUB', 'BAR',
-            'DOORDASH', 'UBER EATS', 'GRUBHUB', 'MCDONALD', 'BAGEL', 'SAPPCLUB.COM',
-            'DELI', 'PHO', 'DOUGHNUT', 'DONUTS', 'SAVORY', 'BEER', 'BREWERY', 'WINE',
-            'COCKTAIL', 'TAVERN', 'BAO', 'JUICE', 'SMOOTHIE', 'WILDLAND', 'SUSHI',
-            'ROBATA', 'POKE', 'JERSEY MIKE', 'SAMS KITCHEN', 'THAI', 'HOMESTATE',
-            'HAWAIIAN', 'GREEK', 'MEDITERRANEAN', 'MEXICAN', 'ITALIAN', 'VIETNAMESE',
-            'INDIAN', 'CHINESE', 'JAPANESE', 'KOREAN', 'FRENCH', 'NIKO', 'FISH MARKET',
-            'PRAGER', 'DAIRY QUEEN', 'MADELINE', 'HENRY', 'RESTAURANT', 'RESTA', 'SUB',
-            'WAWA', 'CAND', 'LITTLE MACS', 'BLUE BOWL', 'SUPERFOOD', 'EATERY', 'YAKISOBA',
-            'DOUGH', 'HEIGHTS MARKET', 'HAWK', 'BAKE', 'BREWING', 'DOCENT', 'BREWER',
-            'CHICKEN', 'FOODZ', 'HONG KONG'
-        ]),
-        ('Coffee', [
-            'COFFEE', 'ROAST', 'CAFE', 'VIGILANTE', 'REVOLUTION', 'STARBUCKS', 'DUNKIN'
-        ]),
-        ('Shopping/Merchandise', [
-            'TARGET', 'WALMART', 'HOMEGOODS', 'MARSHALLS', 'TJ MAXX', 'ROSS', 
-            'NORDSTROM', 'UNIQLO', 'IKEA', 'LOWES', 'HOME DEPOT', 'CVS', 
-            'RITE AID', 'WALGREENS', 'BEST BUY', 'APPLE STORE', 'ETSY', 'USPS', 'FEDEX',
-            'OFFICE DEPOT', 'OFFICE MAX', 'MICRO CENTER', 'GAMESTOP', 'BARNES & NOBLE',
-            'PIGMENT', 'COMETEER', 'VIOC',
-        ]),
-        ('Pet Supplies', ['KAHOOTS', 'CHEWY', 'PETCO', 'PETSMART', 'VET']),
-        ('Automotive/Gas', [
-            'EXPRESS FUEL', 'SHELL', 'CHEVRON', 'MOBIL', '76', 'ARCO', 'COSTCO GAS',
-            'CAR WASH', 'SMOG', 'DMV', 'PARKING', 'FASTTRAK', 'TOYOTA', 'TESLA', 'NYX',
-        ]),
-        ('Gym/Health', ['ACTIVE N FIT', 'YMCA', '24 HOUR FITNESS', 'PLANET FITNESS', 'MACROFACTOR']),
-        ('Personal Care', ['SALON', 'BARBER', 'SPA', 'HAIR', 'NAILS', 'COSMETICS', 'SEPHORA', 'ULTA', 'THRIVECAUSEMETICS']),
-        ('Entertainment', ['STUBHUB', 'TICKETMASTER', 'CINEMA', 'THEATER', 'MUSEUM', 'AQUARIUM', 'STEAM', 'PLAYSTATION', 'NINTENDO']),
-        ('Home Improvement', [
-            'ACE HARDWARE', 'GARDENING', 'LANDSCAPING', 'FURNITURE', 'APPLIANCE', 'LOWE\'S', 'HOME DEPOT',
-            'KEIL ELECTRIC', 'PLUMBING', 'PLANT', 'FLOWER', 'NURSERY', 'WAYFAIR.COM',
-        ]),
-        ('7-Eleven/Convenience Store', ['7-ELEVEN', '7ELEVEN', 'CONVENIENCE STORE', 'CIRCLE K']),
-    ]
-
-    # Apply Rules
+    Lists the keywords that can never decide a category, or that decide too
+    much, as (kind, category, keyword, detail) tuples:
+    - duplicate: listed twice in the same rule
+    - unreachable: already listed by an earlier rule, which always wins
+    - shadowed: contains an earlier rule's keyword, so that rule always wins
+    - redundant: contains another keyword of the same rule, so it never adds a match
+    - broad: BROAD_KEYWORD_LENGTH characters or fewer
+    """
+    findings = []
+    earlier = {}  # keyword -> category of the first rule listing it
     for category, keywords in rules:
+        seen = set()
+        for keyword in keywords:
+            if keyword in seen:
+                findings.append(('duplicate', category, keyword, f"listed twice in {category}"))
+                continue
+            seen.add(keyword)
+            if keyword in earlier:
+                findings.append(('unreachable', category, keyword, f"already in {earlier[keyword]}"))
+                continue
+            shadow = next((other for other in earlier if other in keyword), None)
+            if shadow is not None:
+                findings.append(('shadowed', category, keyword, f"contains '{shadow}' from {earlier[shadow]}"))
+            else:
+                inner = next((other for other in keywords if other != keyword and other in keyword), None)
+                if inner is not None:
+                    findings.append(('redundant', category, keyword, f"contains '{inner}' from the same rule"))
+            if len(keyword) <= BROAD_KEYWORD_LENGTH:
+                findings.append(('broad', category, keyword, f"only {len(keyword)} characters"))
+        for keyword in seen:
+            earlier.setdefault(keyword, category)
+    return findings
+
+
+RULES = load_rules()
+
+
+def _trie_pattern(keywords):
+    """
+    Builds a regex alternation shaped like a trie, so shared prefixes are only
+    tested once. From any starting position it matches the longest keyword.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}  # end of a keyword
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+def compile_rules(rules):
+    """
+    Compiles the rule set into one multi-pattern matcher.
+
+    The pattern is a lookahead, so it reports the longest keyword starting at
+    every position of the description (overlapping matches included). Any
+    shorter keyword matching at that position is a prefix of it, so each
+    keyword is mapped to the best (lowest) rule index among its prefixes.
+    Taking the minimum over all positions gives exactly the category the
+    top-to-bottom loop would have returned.
+    """
+    rank = {}
+    for index, (category, keywords) in enumerate(rules):
         for keyword in keywords:
-            # Check if keyword matches description
-            if keyword in description:
-                return category
+            rank.setdefault(keyword, index)
+
+    best_rank = {
+        keyword: min(rank[prefix] for prefix in rank if keyword.startswith(prefix))
+        for keyword in rank
+    }
+    pattern = re.compile(f'(?=({_trie_pattern(rank)}))')
+    categories = [category for category, _ in rules]
+    return pattern, best_rank, categories
+
+
+RULE_PATTERN, KEYWORD_RANK, RULE_CATEGORIES = compile_rules(RULES)
+
+
+def match_category(description, compiled=None):
+    """
+    Returns the category for an already upper-cased description.
+    compiled is a compile_rules() result; defaults to the RULES above.
+    """
+    pattern, keyword_rank, categories = compiled or (RULE_PATTERN, KEYWORD_RANK, RULE_CATEGORIES)
+    best = len(categories)
+    for keyword in pattern.findall(description):
+        best = min(best, keyword_rank[keyword])
 
-    return 'Uncategorized'
\ No newline at end of file
+    return categories[best] if best < len(categories) else 'Uncategorized'
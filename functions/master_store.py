@@ -0,0 +1,246 @@
+import os
+import json
+import uuid
+import pandas as pd
+
+from functions.compact_dtypes import compact_dtypes, parse_dates
+from functions.date_index import sort_by_date
+from functions.sqlite_store import SqliteStoreWriter, save_sqlite, update_sqlite, sqlite_path_for, sqlite_build_id
+
+# pyarrow is optional: without it the master store falls back to CSV
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = feather = None
+
+MASTER_STORE = 'master_budget.feather'
+MASTER_CSV = 'master_budget.csv'
+# Schema metadata key tying a feather store to the SQLite copy written with it
+BUILD_ID_KEY = b'budget_build_id'
+# DataFrame.attrs entry (and schema metadata key) with build_df's per-account source keys
+ACCOUNT_KEYS = 'account_keys'
+ACCOUNT_KEYS_KEY = b'budget_account_keys'
+
+def to_master_schema(df):
+    """
+    Returns a copy with the store's typed, compact columns (see compact_dtypes),
+    sorted by date so readers can binary-search date ranges.
+    """
+    return sort_by_date(compact_dtypes(df.copy()))
+
+def save_master(df, path=MASTER_STORE, csv_path=None):
+    """
+    Writes the typed master store. The file is written next to the target and
+    swapped in, so a reader never sees a half-written store. Without pyarrow the
+    store is written as CSV instead. Returns the path that was written.
+    The indexed SQLite copy the dashboard queries is written next to it,
+    and swapped in first: the store's new mtime is what tells the dashboard
+    to reload, so by then the matching SQLite copy is already in place.
+    If csv_path is given, a CSV export is written there as well.
+
+    A frame from build_current_budget_df carries per-account source keys
+    (df.attrs[ACCOUNT_KEYS]). If they match the ones saved with the current
+    store, nothing is written; if only some accounts changed, just their rows
+    are replaced in the SQLite copy.
+    """
+    keys = df.attrs.get(ACCOUNT_KEYS)
+    db_path = sqlite_for_store(path) if keys and feather is not None and os.path.exists(path) else None
+    previous = store_account_keys(path) if db_path else None
+    if previous == keys and previous is not None:
+        print("No account changed since the last build, kept the existing store.")
+        if csv_path:
+            to_master_schema(df).to_csv(csv_path, index=False)
+        return path
+
+    df = to_master_schema(df)
+    # Only save_master decides what the keys describe; they are not part of the data
+    df.attrs.pop(ACCOUNT_KEYS, None)
+
+    if feather is None:
+        print("pyarrow is not installed, saving the master store as CSV.")
+        path = os.path.splitext(path)[0] + '.csv'
+
+    build_id = uuid.uuid4().hex
+    tmp_path = f"{path}.tmp"
+    if path.endswith('.csv'):
+        df.to_csv(tmp_path, index=False)
+    else:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = {**(table.schema.metadata or {}), BUILD_ID_KEY: build_id.encode()}
+        if keys:
+            metadata[ACCOUNT_KEYS_KEY] = json.dumps(keys).encode()
+        table = table.replace_schema_metadata(metadata)
+        # Uncompressed so the dashboard can memory-map it
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+
+    accounts = keys.keys() | previous.keys() if previous else set()
+    changed = sorted(account for account in accounts if previous.get(account) != keys.get(account))
+    if changed and len(changed) < len(accounts):
+        print(f"Updating {', '.join(changed)} in the SQLite copy.")
+        update_sqlite(db_path, df[df['Account'].isin(changed)], changed, build_id)
+    else:
+        save_sqlite(df, sqlite_path_for(path), build_id)
+    os.replace(tmp_path, path)
+
+    if csv_path:
+        df.to_csv(csv_path, index=False)
+    return path
+
+def load_master(path):
+    """
+    Loads a master store written by save_master (or a plain master CSV) with
+    the typed schema applied.
+    """
+    if path.endswith('.csv'):
+        return to_master_schema(pd.read_csv(path))
+
+    if feather is None:
+        raise ImportError("pyarrow is required to read the master store.")
+    # A store from save_master already carries its dtypes (compact_dtypes is a
+    # no-op then); a streamed store has plain strings that become categoricals here
+    return compact_dtypes(feather.read_table(path, memory_map=True).to_pandas())
+
+def _store_metadata(path):
+    if path.endswith('.csv') or pa is None:
+        return {}
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).schema.metadata or {}
+
+def store_build_id(path):
+    """
+    The build id save_master (or MasterStoreAppender) stamped on a feather
+    store, or None for CSV and older stores.
+    """
+    build_id = _store_metadata(path).get(BUILD_ID_KEY)
+    return build_id.decode() if build_id else None
+
+def store_account_keys(path):
+    """
+    The per-account source keys save_master stored with a feather store, or
+    None (CSV, streamed or re-categorized store, or an older one).
+    """
+    keys = _store_metadata(path).get(ACCOUNT_KEYS_KEY)
+    return json.loads(keys) if keys else None
+
+def sqlite_for_store(path):
+    """
+    The SQLite copy next to a master store if it was written together with
+    that store, else None (older store, or the copy is missing).
+    """
+    db_path = sqlite_path_for(path)
+    build_id = store_build_id(path)
+    if build_id is None or not os.path.exists(db_path) or sqlite_build_id(db_path) != build_id:
+        return None
+    return db_path
+
+def find_master(search_dirs):
+    """
+    Returns the first master store found in search_dirs, preferring the typed
+    store over CSV, or None.
+    """
+    names = [MASTER_STORE, MASTER_CSV] if feather is not None else [MASTER_CSV]
+    for name in names:
+        for directory in search_dirs:
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                return path
+    return None
+
+class MasterStoreAppender:
+    """
+    Writes a master store one chunk at a time, so memory is bounded by the chunk
+    and not by the whole history. Strings are written plain rather than as
+    categoricals because every chunk has its own categories; load_master
+    converts them on read. Rows are in arrival order (the dashboard sorts on load).
+
+    Use as a context manager: the store is swapped in only if the block exits cleanly.
+    checkpoint() / rollback() drop the rows appended since a point, e.g. the
+    chunks of a file that failed partway through.
+    """
+    def __init__(self, path=MASTER_STORE):
+        if feather is None:
+            print("pyarrow is not installed, streaming the master store as CSV.")
+            path = os.path.splitext(path)[0] + '.csv'
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.rows = 0
+        self._writer = None
+        self._batches = 0
+        # (first, end) batch ranges to leave out of the final store
+        self._dropped = []
+        self.build_id = uuid.uuid4().hex
+        self._sqlite = SqliteStoreWriter(sqlite_path_for(path), self.build_id)
+
+    def __enter__(self):
+        return self
+
+    def append(self, df):
+        df = df.copy()
+        df['date'] = parse_dates(df['date'])
+        df['amount'] = pd.to_numeric(df['amount'], errors='coerce').astype('float64')
+        for col_name in ('description', 'category', 'Account'):
+            values = df[col_name].astype(object)
+            df[col_name] = values.where(values.isna(), values.astype(str))
+        df['Is_Recurring'] = df['Is_Recurring'].eq(True)
+
+        if self.path.endswith('.csv'):
+            df.to_csv(self.tmp_path, mode='a' if self.rows else 'w', header=not self.rows, index=False)
+        else:
+            if self._writer is None:
+                self._schema = pa.schema([
+                    ('date', pa.timestamp('ns')), ('amount', pa.float64()),
+                    ('description', pa.string()), ('category', pa.string()),
+                    ('Account', pa.string()), ('Is_Recurring', pa.bool_()),
+                ], metadata={BUILD_ID_KEY: self.build_id.encode()})
+                self._writer = pa.ipc.new_file(self.tmp_path, self._schema)
+            batch = pa.RecordBatch.from_pandas(df, schema=self._schema, preserve_index=False)
+            self._writer.write_batch(batch)
+            self._batches += 1
+        self._sqlite.append(df)
+        self.rows += len(df)
+
+    def checkpoint(self):
+        """
+        The current position, to pass to rollback() later.
+        """
+        csv_size = os.path.getsize(self.tmp_path) if self.path.endswith('.csv') and self.rows else 0
+        return self.rows, self._batches, csv_size
+
+    def rollback(self, checkpoint):
+        """
+        Drops every row appended since checkpoint.
+        """
+        rows, batches, csv_size = checkpoint
+        if self.path.endswith('.csv'):
+            if self.rows:
+                with open(self.tmp_path, 'r+b') as f:
+                    f.truncate(csv_size)
+        elif self._batches > batches:
+            # Arrow files can't be truncated; the batches are skipped when the store is finished
+            self._dropped.append((batches, self._batches))
+        self._sqlite.truncate(rows)
+        self.rows = rows
+
+    def _drop_batches(self):
+        kept_path = f"{self.tmp_path}.kept"
+        with pa.memory_map(self.tmp_path) as source:
+            reader = pa.ipc.open_file(source)
+            with pa.ipc.new_file(kept_path, self._schema) as writer:
+                for index in range(reader.num_record_batches):
+                    if not any(first <= index < end for first, end in self._dropped):
+                        writer.write_batch(reader.get_batch(index))
+        os.replace(kept_path, self.tmp_path)
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._writer is not None:
+            self._writer.close()
+            if exc_type is None and self.rows and self._dropped:
+                self._drop_batches()
+        # The SQLite copy goes in before the store, like in save_master
+        self._sqlite.close(keep=exc_type is None and self.rows > 0)
+        if exc_type is None and self.rows:
+            os.replace(self.tmp_path, self.path)
+        elif os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+        return False
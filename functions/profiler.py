@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+# Set to 1 (or a JSON path) to profile the pipeline without passing --profile
+PROFILE_ENV = 'BUDGET_PROFILE'
+# Set to a file path to also dump cProfile stats for the run
+CPROFILE_ENV = 'BUDGET_CPROFILE'
+DEFAULT_PROFILE_PATH = 'pipeline_profile.json'
+
+class PipelineProfiler:
+    """
+    Records wall time, rows in/out and peak traced memory for each pipeline stage.
+    Memory is measured with tracemalloc (numpy and pandas allocations included).
+    Stages are meant to be flat: a nested stage resets the peak of the one
+    around it, and stages that overlap in threads share one peak. Stages run
+    in worker processes are not recorded.
+    """
+    def __init__(self, use_cprofile=False):
+        self.records = []
+        self._lock = threading.Lock()
+        self._cprofile = cProfile.Profile() if use_cprofile else None
+        self._started = time.perf_counter()
+
+    def start(self):
+        tracemalloc.start()
+        if self._cprofile:
+            self._cprofile.enable()
+
+    def stop(self):
+        if self._cprofile:
+            self._cprofile.disable()
+        tracemalloc.stop()
+        self.total_seconds = time.perf_counter() - self._started
+
+    @contextmanager
+    def stage(self, name, rows_in=None, account=None):
+        record = {'stage': name, 'account': account, 'rows_in': rows_in, 'rows_out': None}
+        tracemalloc.reset_peak()
+        start_memory = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            record['peak_mb'] = max(tracemalloc.get_traced_memory()[1] - start_memory, 0) / 1e6
+            with self._lock:
+                self.records.append(record)
+
+    def summary(self):
+        """
+        One row per stage name: total seconds, rows in/out and the highest peak.
+        """
+        stages = {}
+        for record in self.records:
+            row = stages.setdefault(record['stage'], {'calls': 0, 'seconds': 0.0, 'rows_in': 0, 'rows_out': 0, 'peak_mb': 0.0})
+            row['calls'] += 1
+            row['seconds'] += record['seconds']
+            row['rows_in'] += record['rows_in'] or 0
+            row['rows_out'] += record['rows_out'] or 0
+            row['peak_mb'] = max(row['peak_mb'], record['peak_mb'])
+        return stages
+
+    def print_summary(self):
+        print("\nPipeline profile")
+        print(f"{'stage':<14}{'calls':>6}{'seconds':>10}{'rows in':>12}{'rows out':>12}{'peak MB':>10}")
+        for name, row in self.summary().items():
+            print(f"{name:<14}{row['calls']:>6}{row['seconds']:>10.3f}{row['rows_in']:>12,}{row['rows_out']:>12,}{row['peak_mb']:>10.1f}")
+        print(f"{'total':<14}{'':>6}{self.total_seconds:>10.3f}\n")
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'total_seconds': self.total_seconds, 'stages': self.summary(), 'records': self.records}, f, indent=2)
+
+    def dump_cprofile(self, path):
+        if self._cprofile:
+            self._cprofile.dump_stats(path)
+
+_active = None
+
+def start_profiling(use_cprofile=False):
+    """
+    Turns stage recording on for the rest of the run.
+    """
+    global _active
+    _active = PipelineProfiler(use_cprofile)
+    _active.start()
+    return _active
+
+def stop_profiling(json_path=None, cprofile_path=None):
+    """
+    Turns recording off, prints the summary table and writes the JSON / cProfile files.
+    """
+    global _active
+    profiler, _active = _active, None
+    if profiler is None:
+        return None
+
+    profiler.stop()
+    profiler.print_summary()
+    if json_path:
+        profiler.write_json(json_path)
+        print(f"Profile saved to {json_path}")
+    if cprofile_path:
+        profiler.dump_cprofile(cprofile_path)
+        print(f"cProfile stats saved to {cprofile_path}")
+    return profiler
+
+def profiling_active():
+    """
+    True between start_profiling() and stop_profiling(), for extra reporting that is too slow to always run.
+    """
+    return _active is not None
+
+@contextmanager
+def profile_stage(name, rows_in=None, account=None):
+    """
+    Records one stage if profiling is on; otherwise a no-op. Callers can set
+    record['rows_out'] on the yielded dict.
+    """
+    if _active is None:
+        yield {}
+        return
+    with _active.stage(name, rows_in, account) as record:
+        yield record
+
+def profile_settings(profile_arg=None, cprofile_arg=None):
+    """
+    Resolves --profile / --cprofile against the environment variables.
+    Returns (json_path or None, cprofile_path or None).
+    """
+    json_path = profile_arg or os.environ.get(PROFILE_ENV) or None
+    if json_path and json_path.lower() in ('0', 'false', 'no'):
+        json_path = None
+    elif json_path and json_path.lower() in ('1', 'true', 'yes'):
+        json_path = DEFAULT_PROFILE_PATH
+    cprofile_path = cprofile_arg or os.environ.get(CPROFILE_ENV) or None
+    if cprofile_path and not json_path:
+        json_path = DEFAULT_PROFILE_PATH
+    return json_path, cprofile_path
@@ -0,0 +1,22 @@
+from functions.apply_categories import apply_categories, DEFAULT_SHARD_SIZE
+from functions.master_store import load_master, save_master
+from functions.profiler import profile_stage
+
+def recategorize_store(store_path, workers=None, shard_size=DEFAULT_SHARD_SIZE, category_cache=None, csv_path=None):
+    """
+    Re-runs categorization (and the recurring flag) on an existing master store
+    and saves it back, without re-reading any CSV. Meant for after editing the
+    rules on a large history: with workers > 1 the distinct descriptions are
+    matched on a process pool. Returns (rows, rows whose category changed).
+    """
+    df = load_master(store_path)
+    print(f"Re-categorizing {len(df)} rows from {store_path}...")
+
+    previous = df['category'].astype(object).to_numpy()
+    df = apply_categories(df, cache_path=category_cache, workers=workers, shard_size=shard_size)
+    changed = int((previous != df['category'].to_numpy()).sum())
+
+    with profile_stage('save_store', rows_in=len(df)):
+        save_master(df, store_path, csv_path=csv_path)
+    print(f"Re-categorized {len(df)} rows ({changed} changed).")
+    return len(df), changed
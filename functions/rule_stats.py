@@ -0,0 +1,147 @@
+import os
+import re
+import json
+import time
+from collections import Counter
+import numpy as np
+import pandas as pd
+
+from functions.get_category import RULES, rules_path, check_rules
+
+# Set to 1 (or a JSON path) to collect rule statistics without passing --rule-stats
+RULE_STATS_ENV = 'BUDGET_RULE_STATS'
+DEFAULT_RULE_STATS_PATH = 'rule_stats.json'
+
+class RuleStats:
+    """
+    Hit counts per category and keyword, and match time per category, over
+    the descriptions the pipeline actually categorizes. Categories are tried
+    top to bottom, each with its own compiled pattern, so a category's time is
+    what testing it costs on the descriptions that get that far. Hits are
+    counted in rows (a merchant seen 40 times is 40 hits).
+    """
+    def __init__(self, rules=RULES):
+        self.rules = rules
+        # Longest keywords first, so a match reports the longest keyword at its position
+        self._patterns = [
+            (category, re.compile('|'.join(re.escape(keyword) for keyword in sorted(set(keywords), key=len, reverse=True))))
+            for category, keywords in rules
+        ]
+        self.category_rows = Counter()
+        self.category_seconds = Counter()
+        self.category_tested = Counter()
+        self.keyword_rows = Counter()
+        self.uncategorized_rows = 0
+        self.total_rows = 0
+
+    def record(self, descriptions, counts):
+        """
+        Adds upper-cased distinct descriptions, seen counts[i] times each.
+        """
+        remaining = list(zip(descriptions, counts))
+        self.total_rows += int(sum(counts))
+        for category, pattern in self._patterns:
+            start = time.perf_counter()
+            unmatched = []
+            for description, count in remaining:
+                match = pattern.search(description)
+                if match is None:
+                    unmatched.append((description, count))
+                else:
+                    # The keyword that decided: leftmost, longest at that position
+                    self.keyword_rows[(category, match.group(0))] += int(count)
+                    self.category_rows[category] += int(count)
+            self.category_seconds[category] += time.perf_counter() - start
+            self.category_tested[category] += len(remaining)
+            remaining = unmatched
+        self.uncategorized_rows += int(sum(count for _, count in remaining))
+
+    def summary(self):
+        categories = {
+            category: {
+                'rows': self.category_rows[category],
+                'tested': self.category_tested[category],
+                'seconds': self.category_seconds[category],
+            }
+            for category, _ in self.rules
+        }
+        keywords = [
+            {'category': category, 'keyword': keyword, 'rows': self.keyword_rows[(category, keyword)]}
+            for category, category_keywords in self.rules for keyword in dict.fromkeys(category_keywords)
+        ]
+        return {
+            'rules_file': rules_path(),
+            'total_rows': self.total_rows,
+            'uncategorized_rows': self.uncategorized_rows,
+            'categories': categories,
+            'keywords': sorted(keywords, key=lambda row: -row['rows']),
+            'findings': [
+                {'kind': kind, 'category': category, 'keyword': keyword, 'detail': detail}
+                for kind, category, keyword, detail in check_rules(self.rules)
+            ],
+        }
+
+    def print_summary(self, top=10):
+        summary = self.summary()
+        print("\nRule statistics (categories in rule order)")
+        print(f"{'category':<28}{'rows':>10}{'share':>8}{'tested':>10}{'ms':>9}")
+        total = summary['total_rows'] or 1
+        for category, row in summary['categories'].items():
+            print(f"{category:<28}{row['rows']:>10,}{row['rows'] / total:>8.1%}{row['tested']:>10,}{row['seconds'] * 1000:>9.1f}")
+        print(f"{'Uncategorized':<28}{summary['uncategorized_rows']:>10,}{summary['uncategorized_rows'] / total:>8.1%}")
+
+        print(f"\nTop {top} keywords")
+        for row in summary['keywords'][:top]:
+            print(f"  {row['keyword']:<26}{row['rows']:>10,}  {row['category']}")
+        unused = [row['keyword'] for row in summary['keywords'] if not row['rows']]
+        if unused:
+            print(f"\n{len(unused)} keywords matched nothing: {', '.join(unused)}")
+        print()
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+
+def collect_rule_stats(df, rules=RULES):
+    """
+    RuleStats over a whole master frame, e.g. the store a build just saved.
+    """
+    # Same upper-cased form the rules see; each distinct description is matched once
+    codes, uniques = pd.factorize(df['description'].astype(object).map(str).str.upper())
+    stats = RuleStats(rules)
+    stats.record(uniques, np.bincount(codes, minlength=len(uniques)))
+    return stats
+
+def report_rule_stats(df, json_path=None):
+    """
+    Collects the statistics for df, prints the tables and writes the JSON file.
+    """
+    stats = collect_rule_stats(df)
+    stats.print_summary()
+    if json_path:
+        stats.write_json(json_path)
+        print(f"Rule statistics saved to {json_path}")
+    return stats
+
+def rule_stats_settings(stats_arg=None):
+    """
+    Resolves --rule-stats against the environment variable. Returns the JSON path or None.
+    """
+    json_path = stats_arg or os.environ.get(RULE_STATS_ENV) or None
+    if json_path and json_path.lower() in ('0', 'false', 'no'):
+        return None
+    if json_path and json_path.lower() in ('1', 'true', 'yes'):
+        return DEFAULT_RULE_STATS_PATH
+    return json_path
+
+def print_rule_check(rules=RULES, verbose=False):
+    """
+    One line about the loaded rules at startup; every finding with verbose set.
+    """
+    findings = check_rules(rules)
+    keyword_count = sum(len(keywords) for _, keywords in rules)
+    print(f"Rules: {len(rules)} categories, {keyword_count} keywords from {rules_path()}"
+          + (f" ({len(findings)} to review, see --rule-stats)" if findings and not verbose else ""))
+    if verbose:
+        for kind, category, keyword, detail in findings:
+            print(f"  {kind:<12}{keyword!r} in {category}: {detail}")
@@ -0,0 +1,152 @@
+import csv
+import hashlib
+import json
+import os
+from collections import defaultdict
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from functions.standardize_columns import COLUMN_MAPPING, STANDARD_COLUMNS
+
+SCHEMA_FILE = 'schemas.json'
+
+# header fingerprint -> resolved layout, shared by every file read in this process
+_layouts = {}
+
+def load_schema_registry(cache_dir):
+    """
+    Loads the layouts resolved on earlier runs from the cache folder.
+    """
+    try:
+        with open(os.path.join(cache_dir, SCHEMA_FILE), encoding='utf-8') as f:
+            _layouts.update(json.load(f))
+    except (OSError, ValueError):
+        pass
+
+def save_schema_registry(cache_dir):
+    os.makedirs(cache_dir, exist_ok=True)
+    schema_path = os.path.join(cache_dir, SCHEMA_FILE)
+    tmp_path = f"{schema_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(_layouts, f, indent=2)
+    os.replace(tmp_path, schema_path)
+
+def read_header(file_path):
+    """
+    Returns (fingerprint, header fields) from the first line of the file.
+    Every export of one bank layout shares the same header line.
+    """
+    with open(file_path, encoding='utf-8-sig', newline='') as f:
+        line = f.readline()
+    fingerprint = hashlib.sha1(line.rstrip('\r\n').encode('utf-8')).hexdigest()
+    return fingerprint, next(csv.reader([line]), [])
+
+def resolve_layout(header):
+    """
+    Works out from the header alone what standardize_columns would do with the
+    file: which column becomes date/description/amount, and whether amount
+    comes from a debit/credit pair. Returns None for headers the typed reader
+    does not handle (empty, duplicate names or an 'account' column); those go
+    through standardize_columns.
+    """
+    names = [c.strip().lower() for c in header]
+    if not names or '' in names or len(set(names)) != len(names) or 'account' in names:
+        return None
+
+    layout = {'split_amount': 'debit' in names and 'credit' in names, 'date_format': None, 'money_as_text': False}
+    for standard_name in ('date', 'description', 'amount'):
+        if standard_name == 'amount' and layout['split_amount']:
+            continue
+        source = next((v for v in [standard_name] + COLUMN_MAPPING[standard_name] if v in names), None)
+        layout[standard_name] = names.index(source) if source else None
+
+    # The bank's own category is always replaced by the rules, so it is never read
+    layout['money'] = [names.index('debit'), names.index('credit')] if layout['split_amount'] else [layout['amount']]
+    layout['money'] = [position for position in layout['money'] if position is not None]
+    return layout
+
+def _used_positions(layout):
+    return sorted(p for p in (layout['date'], layout['description'], *layout['money']) if p is not None)
+
+def _read_columns(file_path, layout):
+    text_columns = [p for p in (layout['date'], layout['description']) if p is not None]
+    money_dtype = str if layout['money_as_text'] else 'float64'
+    # Columns we never use stay plain strings, so no type inference runs on them
+    dtype = defaultdict(lambda: str, {**{p: str for p in text_columns}, **{p: money_dtype for p in layout['money']}})
+    # No usecols: it turns off the field count check, and rows longer than the
+    # header have to be skipped like the plain read_csv path does
+    raw = pd.read_csv(
+        file_path, dtype=dtype, thousands=',', on_bad_lines='skip', index_col=False,
+    )
+    return raw.iloc[:, _used_positions(layout)]
+
+def file_layout(file_path):
+    """
+    (fingerprint, layout) registered for the file's header, or None if it was
+    never resolved. Worker processes send this back with the frame.
+    """
+    fingerprint, _ = read_header(file_path)
+    return (fingerprint, _layouts[fingerprint]) if fingerprint in _layouts else None
+
+def remember_layout(found):
+    """
+    Adds a layout resolved in a worker process (see file_layout) to this process' registry.
+    """
+    if found is not None:
+        fingerprint, layout = found
+        _layouts[fingerprint] = layout
+
+def _money(column):
+    if column.dtype == 'float64':
+        return column.fillna(0)
+    # Only layouts with '$' signs get here; plain replaces are enough for them
+    cleaned = column.str.replace('$', '', regex=False).str.replace(',', '', regex=False)
+    return pd.to_numeric(cleaned, errors='coerce').fillna(0)
+
+def read_typed_csv(file_path, account_name):
+    """
+    Fast path for load_account_csv. Looks the file's header up in the registry
+    and reads only the columns we use, with money parsed by the C parser and
+    dates parsed with the layout's format. Returns the standardized frame, or
+    None if the layout is not supported (the caller then uses standardize_columns).
+    """
+    fingerprint, header = read_header(file_path)
+    if fingerprint not in _layouts:
+        _layouts[fingerprint] = resolve_layout(header)
+    layout = _layouts[fingerprint]
+    if layout is None:
+        return None
+
+    try:
+        raw = _read_columns(file_path, layout)
+    except ValueError:
+        # A '$' or other text in a money column: remember to read it as text for this layout
+        layout['money_as_text'] = True
+        raw = _read_columns(file_path, layout)
+
+    # _read_columns keeps file order, so map positions back to the parsed column names
+    by_position = dict(zip(_used_positions(layout), raw.columns))
+
+    df = pd.DataFrame(index=raw.index)
+    if layout['date'] is not None:
+        dates = raw[by_position[layout['date']]]
+        if layout['date_format'] is None and dates.notna().any():
+            layout['date_format'] = guess_datetime_format(dates.dropna().iloc[0])
+        parsed = pd.to_datetime(dates, format=layout['date_format'], errors='coerce') if layout['date_format'] else None
+        # Keep the raw strings if the format does not fit every value; compact_dtypes sorts them out
+        df['date'] = parsed if parsed is not None and not (parsed.isna() & dates.notna()).any() else dates
+    else:
+        df['date'] = None
+
+    if layout['split_amount']:
+        debit, credit = (_money(raw[by_position[p]]) for p in layout['money'])
+        df['amount'] = (debit + credit) * -1
+    elif layout['money']:
+        df['amount'] = _money(raw[by_position[layout['money'][0]]])
+    else:
+        df['amount'] = None
+
+    df['description'] = raw[by_position[layout['description']]] if layout['description'] is not None else None
+    df['category'] = None
+    df['Account'] = account_name
+    return df[STANDARD_COLUMNS]
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from functions.date_index import date_slice, category_mask
+
+CUBE_KEYS = ['date', 'Account', 'category', 'Is_Recurring', 'sign']
+
+def build_spending_cube(df):
+    """
+    Pre-aggregates the master frame into sums and counts per
+    (day, Account, category, Is_Recurring, sign), sorted by date.
+    sign is 1 for income, -1 for spending and 0 for zero/blank amounts.
+    The dashboard answers its totals and charts from this instead of the raw rows.
+    """
+    amount = df['amount'].astype('float64')
+    keys = pd.DataFrame({
+        'date': df['date'].dt.normalize(),
+        'Account': df['Account'],
+        'category': df['category'],
+        'Is_Recurring': df['Is_Recurring'],
+        'sign': np.sign(amount.fillna(0)).astype('int8'),
+        'amount': amount,
+    })
+    cube = (
+        keys.groupby(CUBE_KEYS, observed=True, sort=True)['amount']
+        .agg(amount='sum', count='size')
+        .reset_index()
+    )
+    return cube
+
+def slice_cube(cube, start_date, end_date, exclude_categories=()):
+    """
+    Cube rows inside the date range, minus the excluded categories.
+    """
+    view = date_slice(cube, start_date, end_date)
+    if len(exclude_categories):
+        view = view[category_mask(view['category'], exclude_categories)]
+    return view
+
+def sum_by(cube_view, column):
+    """
+    Absolute amount per value of column, largest first (the shape the bar charts use).
+    """
+    grouped = cube_view.groupby(column, observed=True)['amount'].sum().abs().reset_index()
+    return grouped.sort_values('amount', ascending=False)
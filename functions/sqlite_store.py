@@ -0,0 +1,248 @@
+import os
+import sqlite3
+import tempfile
+from contextlib import closing
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from functions.date_index import date_slice, category_mask
+
+SQLITE_STORE = 'master_budget.db'
+TABLE = 'transactions'
+# ISO 8601 text, so date order is string order
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+SCHEMA = f"""
+CREATE TABLE {TABLE} (
+    date TEXT,
+    amount REAL,
+    description TEXT,
+    category TEXT,
+    Account TEXT,
+    Is_Recurring INTEGER
+);
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+INDEXES = [
+    f"CREATE INDEX idx_date ON {TABLE} (date)",
+    f"CREATE INDEX idx_account_date ON {TABLE} (Account, date)",
+    f"CREATE INDEX idx_category ON {TABLE} (category)",
+]
+COLUMNS = ['date', 'amount', 'description', 'category', 'Account', 'Is_Recurring']
+# Sort keys the query API accepts (column -> SQL); rowid keeps insertion order on ties
+# (the store's order, except for accounts update_sqlite replaced)
+ORDERS = {
+    'date': 'date ASC, rowid ASC',
+    '-date': 'date DESC, rowid ASC',
+    'amount': 'amount ASC, rowid ASC',
+    '-amount': 'amount DESC, rowid ASC',
+}
+
+def sqlite_path_for(store_path):
+    """
+    The SQLite store that sits next to a master store (master_budget.feather -> master_budget.db).
+    """
+    return os.path.join(os.path.dirname(store_path), SQLITE_STORE)
+
+def _column(values):
+    # Plain Python values with None for missing, which is what sqlite3 binds fastest
+    values = values.astype(object)
+    return values.where(values.notna(), None).tolist()
+
+def _rows(df):
+    dates = np.datetime_as_string(df['date'].to_numpy(dtype='datetime64[s]'), unit='s')
+    return zip(
+        [None if date == 'NaT' else date for date in dates.tolist()],
+        _column(df['amount'].astype('float64')),
+        _column(df['description']),
+        _column(df['category']),
+        _column(df['Account']),
+        df['Is_Recurring'].astype(int).tolist(),
+    )
+
+class SqliteStoreWriter:
+    """
+    Builds the SQLite store in a temporary file, one batch at a time, and swaps
+    it in on a clean exit. Indexes are created once at the end, which is much
+    faster than keeping them up to date while inserting.
+    Expects frames in the store's typed schema (see compact_dtypes).
+    build_id is saved with the rows, so readers can tell which master store
+    this copy belongs to (see sqlite_build_id).
+    """
+    def __init__(self, path=SQLITE_STORE, build_id=None):
+        self.path = path
+        self.build_id = build_id
+        # A temp file of its own, so two writers never touch each other's file
+        fd, self.tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=f"{os.path.basename(path)}.", suffix='.tmp')
+        os.close(fd)
+        self._conn = sqlite3.connect(self.tmp_path)
+        # A half-written temp file is never read (it is swapped in whole), so skip the journal
+        self._conn.execute("PRAGMA journal_mode = OFF")
+        self._conn.execute("PRAGMA synchronous = OFF")
+        self._conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def append(self, df):
+        self._conn.executemany(f"INSERT INTO {TABLE} VALUES (?, ?, ?, ?, ?, ?)", _rows(df))
+
+    def truncate(self, rows):
+        """
+        Drops everything appended after the first `rows` rows.
+        """
+        # Rows are only ever appended, so rowids run 1..n
+        self._conn.execute(f"DELETE FROM {TABLE} WHERE rowid > ?", (int(rows),))
+
+    def close(self, keep=True):
+        """
+        Indexes and swaps the store in if keep is set, otherwise throws it away.
+        """
+        if keep:
+            for statement in INDEXES:
+                self._conn.execute(statement)
+            if self.build_id is not None:
+                self._conn.execute("INSERT INTO meta VALUES ('build_id', ?)", (self.build_id,))
+            self._conn.commit()
+        self._conn.close()
+        if keep:
+            os.replace(self.tmp_path, self.path)
+        elif os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(keep=exc_type is None)
+        return False
+
+def save_sqlite(df, path=SQLITE_STORE, build_id=None):
+    """
+    Writes the whole master frame to the SQLite store (swapped in atomically).
+    """
+    with SqliteStoreWriter(path, build_id) as writer:
+        writer.append(df)
+    return path
+
+def update_sqlite(path, df, accounts, build_id=None):
+    """
+    Replaces the rows of `accounts` in an existing SQLite store with df (their
+    new rows) and stamps build_id, all in one transaction, so a reader sees
+    either the old or the new copy. Rows of the other accounts stay as they
+    are; replaced rows go to the end, so on equal dates they sort after them.
+    """
+    accounts = list(accounts)
+    with closing(sqlite3.connect(path)) as conn:
+        with conn:
+            conn.execute(f"DELETE FROM {TABLE} WHERE Account IN ({', '.join('?' * len(accounts))})", accounts)
+            conn.executemany(f"INSERT INTO {TABLE} VALUES (?, ?, ?, ?, ?, ?)", _rows(df))
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('build_id', ?)", (build_id,))
+    return path
+
+def _connect(path):
+    # Read-only, so a reader can never lock the store a rebuild is about to replace
+    return closing(sqlite3.connect(f"{Path(os.path.abspath(path)).as_uri()}?mode=ro", uri=True))
+
+def sqlite_build_id(path):
+    """
+    The build_id the store was written with, or None (missing, older or unreadable file).
+    """
+    try:
+        with _connect(path) as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'build_id'").fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+def _where(start_date=None, end_date=None, accounts=None, exclude_categories=(), sign=None):
+    clauses, params = [], []
+    if start_date is not None:
+        clauses.append("date >= ?")
+        params.append(pd.Timestamp(start_date).normalize().strftime(DATE_FORMAT))
+    if end_date is not None:
+        # Whole days, like date_slice
+        clauses.append("date < ?")
+        params.append((pd.Timestamp(end_date).normalize() + pd.Timedelta(days=1)).strftime(DATE_FORMAT))
+    if accounts is not None:
+        accounts = list(accounts)
+        clauses.append(f"Account IN ({', '.join('?' * len(accounts))})" if accounts else "0")
+        params.extend(accounts)
+    if len(exclude_categories):
+        exclude_categories = list(exclude_categories)
+        clauses.append(f"(category IS NULL OR category NOT IN ({', '.join('?' * len(exclude_categories))}))")
+        params.extend(exclude_categories)
+    if sign is not None:
+        clauses.append({-1: "amount < 0", 0: "amount = 0", 1: "amount > 0"}[sign])
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+def query_transactions(path, start_date=None, end_date=None, accounts=None, exclude_categories=(),
+                       sign=None, columns=COLUMNS, order_by=None, limit=None):
+    """
+    Rows matching the filters, with only the requested columns. Filters mirror
+    the dashboard's: whole-day date range, accounts to include, categories to
+    exclude, and sign (-1 spending, 1 income). order_by is one of ORDERS
+    ('-amount' for largest first); limit gives the top N.
+    """
+    unknown = set(columns) - set(COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown columns: {sorted(unknown)}")
+    where, params = _where(start_date, end_date, accounts, exclude_categories, sign)
+    sql = f"SELECT {', '.join(columns)} FROM {TABLE}{where}"
+    if order_by:
+        sql += f" ORDER BY {ORDERS[order_by]}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+
+    with _connect(path) as conn:
+        df = pd.read_sql_query(sql, conn, params=params)
+    if 'date' in df.columns:
+        df['date'] = pd.to_datetime(df['date'])
+    if 'Is_Recurring' in df.columns:
+        df['Is_Recurring'] = df['Is_Recurring'].astype(bool)
+    return df
+
+def count_transactions(path, **filters):
+    """
+    Number of rows matching the same filters as query_transactions, counted on the index.
+    """
+    where, params = _where(**filters)
+    with _connect(path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {TABLE}{where}", params).fetchone()[0]
+
+def query_frame(df, start_date=None, end_date=None, accounts=None, exclude_categories=(),
+                sign=None, columns=COLUMNS, order_by=None, limit=None):
+    """
+    query_transactions over an in-memory master frame sorted by date, for a
+    store without an up-to-date SQLite copy. Same filters, order and result.
+    """
+    unknown = set(columns) - set(COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown columns: {sorted(unknown)}")
+    if start_date is not None or end_date is not None:
+        df = date_slice(df, start_date or df['date'].min(), end_date or df['date'].max())
+    mask = np.ones(len(df), dtype=bool)
+    if accounts is not None:
+        mask &= df['Account'].isin(list(accounts)).to_numpy()
+    if len(exclude_categories):
+        mask &= category_mask(df['category'], exclude_categories)
+    if sign is not None:
+        mask &= (np.sign(df['amount'].to_numpy()) == sign)
+    rows = df[mask]
+    if order_by:
+        column = order_by.lstrip('-')
+        rows = rows.sort_values(column, ascending=not order_by.startswith('-'), kind='stable')
+    if limit is not None:
+        rows = rows.head(int(limit))
+
+    rows = rows[list(columns)].reset_index(drop=True)
+    # Plain strings, like the SQLite path returns
+    for column in ('description', 'category', 'Account'):
+        if column in rows.columns:
+            rows[column] = rows[column].astype(object)
+    return rows
+
+def count_frame(df, **filters):
+    """
+    count_transactions over an in-memory master frame.
+    """
+    return len(query_frame(df, columns=['amount'], **filters))
@@ -1,5 +1,14 @@
 import pandas as pd
 
+# Standard name -> header variants used by the banks, in priority order
+COLUMN_MAPPING = {
+    'date': ['posting date', 'transaction date', 'date', 'post date'],
+    'description': ['description', 'merchant', 'details'], 
+    'amount': ['amount'],
+    'category': ['category', 'type']
+}
+STANDARD_COLUMNS = ['date', 'amount', 'description', 'category', 'Account']
+
 def standardize_columns(df):
     """
     Normalizes column names, converts money columns to actual numbers, 
@@ -22,16 +31,8 @@ def standardize_columns(df):
         clean_money_column('credit')
         df['amount'] = (df['debit'] + df['credit']) * -1
 
-    # Define Mapping
-    column_mapping = {
-        'date': ['posting date', 'transaction date', 'date', 'post date'],
-        'description': ['description', 'merchant', 'details'], 
-        'amount': ['amount'],
-        'category': ['category', 'type']
-    }
-
     # Apply Renaming
-    for standard_name, variations in column_mapping.items():
+    for standard_name, variations in COLUMN_MAPPING.items():
         if standard_name not in df.columns:
             for variant in variations:
                 if variant in df.columns:
@@ -45,7 +46,7 @@ def standardize_columns(df):
     clean_money_column('amount')
 
     # Final Filter
-    desired_cols = ['date', 'amount', 'description', 'category', 'Account']
+    desired_cols = STANDARD_COLUMNS
     
     for col in desired_cols:
         if col not in df.columns:
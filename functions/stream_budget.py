@@ -0,0 +1,74 @@
+import os
+import pandas as pd
+
+from functions.build_df import find_account_files
+from functions.standardize_columns import standardize_columns
+from functions.apply_categories import apply_categories, load_category_cache, save_category_cache
+from functions.master_store import MasterStoreAppender, MASTER_STORE
+from functions.profiler import profile_stage
+
+DEFAULT_CHUNKSIZE = 100_000
+
+def iter_account_chunks(account_name, file_path, chunksize=DEFAULT_CHUNKSIZE, categories=None):
+    """
+    Reads one account's CSV in chunks of `chunksize` rows and yields each chunk
+    standardized and categorized, the same way build_current_budget_df treats
+    a whole file. categories is a loaded category cache dict, shared by all
+    chunks (see apply_categories).
+    """
+    categories = {} if categories is None else categories
+    reader = pd.read_csv(file_path, on_bad_lines='skip', index_col=False, chunksize=chunksize)
+    with reader:
+        for chunk in reader:
+            chunk['Account'] = account_name
+            with profile_stage('standardize', rows_in=len(chunk), account=account_name) as stage:
+                chunk = standardize_columns(chunk)
+                stage['rows_out'] = len(chunk)
+            yield apply_categories(chunk, cache=categories)
+
+def stream_budget_to_store(directory, output_path=MASTER_STORE, chunksize=DEFAULT_CHUNKSIZE, category_cache=None):
+    """
+    Streaming version of build_current_budget_df + save_master for very large
+    exports. Each CSV is read in fixed-size chunks, and every chunk is
+    standardized, categorized and appended to the master store before the next
+    one is read. Peak memory is bounded by the chunk size, not the total history.
+    A file that fails partway through is left out entirely, like in the normal
+    build. The category cache is loaded once and saved once at the end.
+    Returns (store path, rows written).
+    """
+    abs_root = os.path.abspath(directory)
+    if not os.path.exists(abs_root):
+        raise FileNotFoundError(f"The directory {abs_root} does not exist.")
+
+    print(f"Scanning directory: {abs_root}\n")
+
+    categories = load_category_cache(category_cache) if category_cache else {}
+    cache_size = len(categories)
+    with MasterStoreAppender(output_path) as store:
+        for account_name, newest_file in find_account_files(abs_root):
+            if newest_file is None:
+                print(f"[{account_name}] No CSV files found.")
+                continue
+
+            print(f"[{account_name}] Streaming: {os.path.basename(newest_file)}")
+            checkpoint = store.checkpoint()
+            try:
+                for chunk in iter_account_chunks(account_name, newest_file, chunksize, categories):
+                    with profile_stage('append_store', rows_in=len(chunk), account=account_name):
+                        store.append(chunk)
+            except Exception as e:
+                # Drop the chunks this file already wrote
+                store.rollback(checkpoint)
+                print(f"  Error reading {newest_file}: {e}")
+                print("  File skipped.")
+                continue
+            print(f"  {store.rows - checkpoint[0]} rows written.")
+
+    if category_cache and len(categories) != cache_size:
+        save_category_cache(category_cache, categories)
+
+    if store.rows:
+        print(f"Streamed {store.rows} total rows to {store.path}\n")
+    else:
+        print("No data found in any subdirectory.")
+    return store.path, store.rows
@@ -0,0 +1,97 @@
+import os
+import time
+import threading
+
+# watchdog is optional: with it changes are picked up from inotify/FSEvents,
+# without it the folders are polled
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = FileSystemEventHandler = None
+
+def snapshot_csvs(abs_root):
+    """
+    {csv path: (size, mtime_ns)} for every CSV in the account folders.
+    One stat per file, so polling this every few seconds is cheap.
+    """
+    snapshot = {}
+    with os.scandir(abs_root) as entries:
+        for entry in entries:
+            # Skip hidden folders (e.g. CACHE_DIR)
+            if not entry.is_dir() or entry.name.startswith('.'):
+                continue
+            with os.scandir(entry.path) as files:
+                for f in files:
+                    if f.name.lower().endswith('.csv') and f.is_file():
+                        stat = f.stat()
+                        snapshot[f.path] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+def changed_accounts(before, after):
+    """
+    Account folders with a CSV that was added, changed or removed between two snapshots.
+    """
+    paths = {p for p in before.keys() | after.keys() if before.get(p) != after.get(p)}
+    return sorted({os.path.basename(os.path.dirname(p)) for p in paths})
+
+def _start_observer(abs_root, wake):
+    if Observer is None:
+        return None
+
+    class CsvHandler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if not event.is_directory:
+                wake.set()
+
+    observer = Observer()
+    observer.schedule(CsvHandler(), abs_root, recursive=True)
+    observer.daemon = True
+    observer.start()
+    return observer
+
+def watch_data(directory, on_change, interval=2.0, debounce=1.5, stop_event=None):
+    """
+    Calls on_change(accounts) whenever CSVs in the account folders change,
+    until stop_event is set (or forever). A burst of events (a browser still
+    writing a download, several exports dropped at once) is debounced: the
+    rebuild starts only once the folders have been quiet for `debounce` seconds.
+    Uses watchdog when installed, otherwise polls every `interval` seconds.
+    """
+    abs_root = os.path.abspath(directory)
+    stop_event = stop_event or threading.Event()
+    wake = threading.Event()
+    observer = _start_observer(abs_root, wake)
+    print(f"Watching {abs_root} for new exports ({'file events' if observer else f'polling every {interval:g}s'}).")
+
+    last = snapshot_csvs(abs_root)
+    try:
+        while not stop_event.is_set():
+            # With an observer, sleep until something happens; the timeout is a safety net
+            wake.wait(interval if observer is None else max(interval, 30))
+            wake.clear()
+            current = snapshot_csvs(abs_root)
+            if current == last:
+                continue
+
+            # Wait for the folders to settle before rebuilding
+            while not stop_event.is_set():
+                time.sleep(debounce)
+                settled = snapshot_csvs(abs_root)
+                if settled == current:
+                    break
+                current = settled
+            wake.clear()
+
+            accounts = changed_accounts(last, current)
+            last = current
+            print(f"\nChange detected in: {', '.join(accounts)}")
+            try:
+                on_change(accounts)
+            except Exception as e:
+                print(f"  Rebuild failed: {e}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if observer is not None:
+            observer.stop()
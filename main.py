@@ -1,10 +1,76 @@
 import os
 import sys
+import argparse
 import subprocess
 
-from functions.build_df import build_current_budget_df
+from functions.build_df import build_current_budget_df, CACHE_DIR
+from functions.master_store import save_master, find_master, load_master, MASTER_STORE
+from functions.stream_budget import stream_budget_to_store, DEFAULT_CHUNKSIZE
+from functions.recategorize import recategorize_store
+from functions.profiler import profile_settings, start_profiling, stop_profiling, profile_stage
+from functions.watch_data import watch_data
+from functions.rule_stats import rule_stats_settings, print_rule_check, report_rule_stats
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build the master budget and launch the dashboard.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Load and standardize account folders in parallel with this many workers.")
+    parser.add_argument('--processes', action='store_true',
+                        help="Use a process pool instead of threads for --workers.")
+    parser.add_argument('--csv', action='store_true',
+                        help="Also export the master budget as CSV (see output_path).")
+    parser.add_argument('--history', action='store_true',
+                        help="Load every CSV in each account folder (not just the newest) and drop overlapping rows.")
+    parser.add_argument('--stream', nargs='?', type=int, const=DEFAULT_CHUNKSIZE, metavar='CHUNKSIZE',
+                        help="Read exports in chunks of CHUNKSIZE rows and append them to the store (for very large files).")
+    parser.add_argument('--recategorize', action='store_true',
+                        help="Re-run only the categorization on the existing store (e.g. after editing the rules); --workers N uses N processes.")
+    parser.add_argument('--rule-stats', nargs='?', const='rule_stats.json', metavar='JSON_PATH',
+                        help="List rule problems and print per-category/keyword hits and match time for the store (or set BUDGET_RULE_STATS=1).")
+    parser.add_argument('--watch', action='store_true',
+                        help="Keep running and rebuild the store when new CSVs land; the dashboard picks it up live.")
+    parser.add_argument('--profile', nargs='?', const='pipeline_profile.json', metavar='JSON_PATH',
+                        help="Print per-stage timings/memory and save them as JSON (or set BUDGET_PROFILE=1).")
+    parser.add_argument('--cprofile', metavar='PATH',
+                        help="Also dump cProfile stats for the build (or set BUDGET_CPROFILE).")
+    args = parser.parse_args()
+    if args.stream and (args.csv or args.history):
+        # the streamed store only ever holds one chunk, so there is nothing to dedupe or export from
+        parser.error("--stream can't be combined with --csv or --history")
+    return args
+
+def build_store(args, directory, output_path, cache_dir, category_cache):
+    """
+    Builds the master store from the data directory. Returns (store path, rows).
+    """
+    store_path = None
+    if args.stream:
+        # chunk by chunk straight into the store, nothing is held in memory
+        store_path, row_count = stream_budget_to_store(
+            directory, MASTER_STORE, chunksize=args.stream, category_cache=category_cache
+        )
+    else:
+        budget_df = build_current_budget_df(
+            directory, category_cache=category_cache, cache_dir=cache_dir,
+            workers=args.workers, use_processes=args.processes, history=args.history
+        )
+        row_count = len(budget_df)
+
+    if row_count:
+        print(f"Success! Combined {row_count} rows.")
+        
+        if not args.stream:
+            # local typed store for the dashboard, CSV only when asked for
+            with profile_stage('save_store', rows_in=row_count):
+                store_path = save_master(budget_df, MASTER_STORE, csv_path=output_path if args.csv else None)
+        print(f"Master budget saved to {store_path}")
+        if args.csv and not args.stream:
+            print(f"CSV export saved to {output_path}")
+    return store_path, row_count
 
 def main():
+    args = parse_args()
+
     # when ready change to the line below to have this run in the current directory
     # directory = '.'
 
@@ -12,18 +78,41 @@ def main():
     output_path = r'/mnt/c/Users/matta/Downloads/master_budget.csv'
     
     dashboard_path = os.path.join('dashboard', 'dashboard.py')
+    cache_dir = os.path.join(directory, CACHE_DIR)
+    category_cache = os.path.join(cache_dir, 'categories.json')
+    profile_path, cprofile_path = profile_settings(args.profile, args.cprofile)
+    if profile_path:
+        start_profiling(use_cprofile=bool(cprofile_path))
+    rule_stats_path = rule_stats_settings(args.rule_stats)
+    print_rule_check(verbose=bool(rule_stats_path))
     
     try:
-        budget_df = build_current_budget_df(directory)
-        
-        if not budget_df.empty:
-            print(f"Success! Combined {len(budget_df)} rows.")
-            
-            # local save for testing
-            budget_df.to_csv('master_budget.csv', index=False)
-            budget_df.to_csv(output_path, index=False)
-            print(f"Master budget saved to {output_path}")
+        try:
+            existing_store = find_master(['.']) if args.recategorize else None
+            if existing_store:
+                # no CSVs are read, the rules are just re-applied to the stored rows
+                store_path = existing_store
+                row_count, _ = recategorize_store(
+                    existing_store, workers=args.workers, category_cache=category_cache,
+                    csv_path=output_path if args.csv else None
+                )
+            else:
+                if args.recategorize:
+                    print("No master store to re-categorize yet, building it from the CSVs.")
+                store_path, row_count = build_store(args, directory, output_path, cache_dir, category_cache)
+        finally:
+            # also when the build fails
+            if profile_path:
+                stop_profiling(profile_path, cprofile_path)
+
+        if row_count and rule_stats_path:
+            # over every stored transaction, including files that came from the cache
+            report_rule_stats(load_master(store_path), rule_stats_path)
+        if not row_count and args.watch:
+            print("No data found yet, waiting for exports to land.")
 
+        # with --watch the dashboard and watcher start even without data, the first export builds the store
+        if row_count or args.watch:
             # dashboard time! 
             if os.path.exists(dashboard_path):
                 # CHECK: Are we running in WSL?
@@ -37,11 +126,22 @@ def main():
                 print("Dashboard is starting...")
                 print(f"👉 GO TO THIS URL: http://localhost:8501")
                 
-                subprocess.run([
+                command = [
                     sys.executable, "-m", "streamlit", "run", dashboard_path,
                     f"--server.address={server_address}",
                     "--server.headless=true"
-                ])
+                ]
+                if args.watch:
+                    # the dashboard notices the new store on its own, no restart needed
+                    server = subprocess.Popen(command)
+                    try:
+                        # every account is rescanned, but (without --stream) the file cache
+                        # only re-reads the CSVs that changed, so `accounts` is just for the log
+                        watch_data(directory, lambda accounts: build_store(args, directory, output_path, cache_dir, category_cache))
+                    finally:
+                        server.terminate()
+                else:
+                    subprocess.run(command)
             else:
                 print(f"Error: Could not find dashboard file at {dashboard_path}")
 
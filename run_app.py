@@ -1,9 +1,18 @@
 import os
 import sys
-import webbrowser
-from threading import Timer
-import streamlit.web.cli as stcli
-from functions.build_df import build_current_budget_df
+import time
+import argparse
+import threading
+import multiprocessing
+import urllib.request
+
+# Only light imports up here: pandas is only imported by the ETL process and
+# streamlit only once that process is running
+
+STARTED = time.perf_counter()
+HEALTH_URL = "http://localhost:8501/_stcore/health"
+# Set while the first build is running; the dashboard shows a "building" page instead of an error
+BUILDING_ENV = 'BUDGET_BUILDING'
 
 def resolve_path(path):
     if getattr(sys, 'frozen', False):
@@ -12,33 +21,159 @@ def resolve_path(path):
         base_path = os.path.dirname(os.path.abspath(__file__))
     return os.path.join(base_path, path)
 
-if __name__ == "__main__":
-    exe_dir = os.getcwd() 
-    output_file = os.path.join(exe_dir, 'master_budget.csv')
-    
-    print("------------------------------------------------")
-    print("      💸 bud.get | Personal Finance Tool        ")
-    print("------------------------------------------------")
+def elapsed():
+    return time.perf_counter() - STARTED
+
+def build_store(args, exe_dir):
+    from functions.build_df import build_current_budget_df, CACHE_DIR
+    from functions.master_store import save_master, find_master, MASTER_STORE, MASTER_CSV
+    from functions.stream_budget import stream_budget_to_store, DEFAULT_CHUNKSIZE
+    from functions.profiler import profile_stage
+
+    output_file = os.path.join(exe_dir, MASTER_STORE)
+    csv_file = os.path.join(exe_dir, MASTER_CSV)
+    cache_dir = os.path.join(exe_dir, CACHE_DIR)
+    category_cache = os.path.join(cache_dir, 'categories.json')
+    existing_store = find_master([exe_dir]) if args.recategorize else None
+    if existing_store:
+        from functions.recategorize import recategorize_store
+        # Only the rules are re-applied, no CSV is read
+        row_count, _ = recategorize_store(existing_store, workers=args.workers, category_cache=category_cache,
+                                          csv_path=csv_file if args.csv else None)
+        output_file = existing_store
+    elif args.stream is not None:
+        # chunk by chunk straight into the store, nothing is held in memory
+        output_file, row_count = stream_budget_to_store(exe_dir, output_file, chunksize=args.stream or DEFAULT_CHUNKSIZE, category_cache=category_cache)
+    else:
+        df = build_current_budget_df(
+            exe_dir, category_cache=category_cache, cache_dir=cache_dir,
+            workers=args.workers, use_processes=args.processes, history=args.history
+        )
+        row_count = len(df)
+        if row_count:
+            with profile_stage('save_store', rows_in=row_count):
+                output_file = save_master(df, output_file, csv_path=csv_file if args.csv else None)
+    if row_count:
+        print(f"   Success! Saved {row_count} transactions.")
+        return output_file
+    print("   ⚠️  No data found.")
+    return None
+
+def run_etl(args, exe_dir, first_build_done):
+    """
+    The first build (and then the watcher, with --watch). Runs in its own
+    process so it does not compete with the server for the GIL.
+    """
+    from functions.profiler import profile_settings, start_profiling, stop_profiling
+    from functions.rule_stats import rule_stats_settings, print_rule_check, report_rule_stats
 
+    profile_path, cprofile_path = profile_settings(args.profile, args.cprofile)
+    if profile_path:
+        start_profiling(use_cprofile=bool(cprofile_path))
+    rule_stats_path = rule_stats_settings(args.rule_stats)
+
+    store_path = None
     try:
         print("1. Scanning for data...")
-        df = build_current_budget_df(exe_dir)
-        if not df.empty:
-            df.to_csv(output_file, index=False)
-            print(f"   Success! Saved {len(df)} transactions.")
-        else:
-            print("   ⚠️  No data found.")
+        print_rule_check(verbose=bool(rule_stats_path))
+        store_path = build_store(args, exe_dir)
     except Exception as e:
         print(f"   Error: {e}")
 
-    print("\n2. Launching Dashboard...")
-    
-    # --- THE FIX: Force Open Browser ---
-    def open_browser():
-        webbrowser.open_new("http://localhost:8501")
-    
-    # Wait 1.5 seconds for the server to start, then open
-    Timer(1.5, open_browser).start()
+    if profile_path:
+        stop_profiling(profile_path, cprofile_path)
+    if rule_stats_path and store_path:
+        from functions.master_store import load_master
+        report_rule_stats(load_master(store_path), rule_stats_path)
+    first_build_done.set()
+
+    if args.watch:
+        from functions.watch_data import watch_data
+        # The open dashboard reloads the new store by itself
+        # Rebuilds read the CSVs again
+        args.recategorize = False
+        watch_data(exe_dir, lambda accounts: build_store(args, exe_dir))
+
+def wait_for_data(etl, first_build_done, timings):
+    # Flips the dashboard from its "building" page to the data
+    while not first_build_done.wait(0.1) and etl.is_alive():
+        pass
+    os.environ.pop(BUILDING_ENV, None)
+    timings['data ready'] = elapsed()
+    report_startup(timings)
+
+def wait_for_server(timings, timeout=60):
+    """
+    Polls Streamlit's health endpoint and opens the browser once it answers.
+    """
+    import webbrowser
+
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(HEALTH_URL, timeout=1) as response:
+                if response.status == 200:
+                    break
+        except OSError:
+            time.sleep(0.1)
+    else:
+        print("   ⚠️  Dashboard did not answer, open http://localhost:8501 yourself.")
+        return
+
+    timings['server ready'] = elapsed()
+    webbrowser.open_new("http://localhost:8501")
+    report_startup(timings)
+
+_report_lock = threading.Lock()
+
+def report_startup(timings):
+    # Printed once both the data and the server are ready (whichever finishes last prints)
+    with _report_lock:
+        if 'data ready' in timings and 'server ready' in timings and not timings.get('reported'):
+            timings['reported'] = True
+            print(f"\n⏱️  Startup: server ready in {timings['server ready']:.1f}s, data ready in {timings['data ready']:.1f}s\n")
+
+if __name__ == "__main__":
+    # Needed for --processes in the frozen exe
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(description="bud.get launcher")
+    parser.add_argument('--workers', type=int, default=1, help="Load account folders in parallel with this many workers.")
+    parser.add_argument('--processes', action='store_true', help="Use a process pool instead of threads for --workers.")
+    parser.add_argument('--csv', action='store_true', help="Also export master_budget.csv next to the app.")
+    parser.add_argument('--history', action='store_true', help="Load every CSV per account folder and drop overlapping rows.")
+    parser.add_argument('--stream', nargs='?', type=int, const=0, metavar='CHUNKSIZE',
+                        help="Read exports in chunks of CHUNKSIZE rows (default 100,000) and append them to the store.")
+    parser.add_argument('--recategorize', action='store_true', help="Re-apply the category rules to the existing store instead of rebuilding it.")
+    parser.add_argument('--rule-stats', nargs='?', const='rule_stats.json', metavar='JSON_PATH',
+                        help="List rule problems and print hits and match time per category/keyword (or set BUDGET_RULE_STATS=1).")
+    parser.add_argument('--watch', action='store_true', help="Rebuild the store in the background when new CSVs land.")
+    parser.add_argument('--profile', nargs='?', const='pipeline_profile.json', metavar='JSON_PATH',
+                        help="Print per-stage timings/memory and save them as JSON (or set BUDGET_PROFILE=1).")
+    parser.add_argument('--cprofile', metavar='PATH', help="Also dump cProfile stats for the build (or set BUDGET_CPROFILE).")
+    args, _ = parser.parse_known_args()
+    if args.stream is not None and (args.csv or args.history):
+        parser.error("--stream can't be combined with --csv or --history")
+
+    exe_dir = os.getcwd()
+
+    print("------------------------------------------------")
+    print("      💸 bud.get | Personal Finance Tool        ")
+    print("------------------------------------------------")
+
+    # The server comes up while the data is built in another process; the
+    # dashboard picks the store up as soon as it is swapped in
+    timings = {}
+    os.environ[BUILDING_ENV] = '1'
+    first_build_done = multiprocessing.Event()
+    # Not a daemon: --processes starts its own worker processes
+    etl = multiprocessing.Process(target=run_etl, args=(args, exe_dir, first_build_done))
+    etl.start()
+    threading.Thread(target=wait_for_data, args=(etl, first_build_done, timings), daemon=True).start()
+    threading.Thread(target=wait_for_server, args=(timings,), daemon=True).start()
+
+    print("2. Launching Dashboard...")
+    import streamlit.web.cli as stcli
 
     dashboard_path = resolve_path(os.path.join('dashboard', 'dashboard.py'))
 
@@ -47,7 +182,11 @@ if __name__ == "__main__":
         "run",
         dashboard_path,
         "--global.developmentMode=false",
-        "--server.headless=true", # We keep this true so we can control the open with the Timer above
+        "--server.headless=true", # We keep this true so we open the browser ourselves once the server is up
     ]
-    
-    sys.exit(stcli.main())
\ No newline at end of file
+
+    try:
+        sys.exit(stcli.main())
+    finally:
+        # With --watch the ETL process runs until the server stops
+        etl.terminate()